@@ -0,0 +1,104 @@
+-- CreateTable
+CREATE TABLE "users" (
+    "id" UUID NOT NULL,
+    "username" VARCHAR(50) NOT NULL,
+    "email" VARCHAR(100) NOT NULL,
+    "password" TEXT,
+    "google_id" TEXT,
+    "created_at" TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "users_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateTable
+CREATE TABLE "contact_messages" (
+    "id" UUID NOT NULL,
+    "message" TEXT NOT NULL,
+    "user_id" UUID,
+    "email" VARCHAR(255),
+    "created_at" TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "contact_messages_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateTable
+CREATE TABLE "playlists" (
+    "id" UUID NOT NULL,
+    "name" VARCHAR(100) NOT NULL,
+    "user_id" UUID NOT NULL,
+    "created_at" TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "playlists_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateTable
+CREATE TABLE "tracks" (
+    "id" UUID NOT NULL,
+    "title" VARCHAR(100) NOT NULL,
+    "artist" VARCHAR(100) NOT NULL,
+    "playlist_id" UUID NOT NULL,
+
+    CONSTRAINT "tracks_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateTable
+CREATE TABLE "songs" (
+    "id" UUID NOT NULL,
+    "deezer_id" VARCHAR(50) NOT NULL,
+    "title" VARCHAR(255) NOT NULL,
+    "artist" VARCHAR(255) NOT NULL,
+    "album" VARCHAR(255),
+    "genre" VARCHAR(50) NOT NULL,
+    "cover_url" TEXT NOT NULL,
+    "preview_url" TEXT,
+    "duration" INTEGER NOT NULL DEFAULT 0,
+    "play_count" INTEGER NOT NULL DEFAULT 0,
+    "last_played_at" TIMESTAMP(6),
+    "created_at" TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMP(6) NOT NULL,
+
+    CONSTRAINT "songs_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateTable
+CREATE TABLE "listens" (
+    "id" UUID NOT NULL,
+    "user_id" UUID,
+    "song_id" UUID NOT NULL,
+    "played_at" TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "listens_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "users_username_key" ON "users"("username");
+
+-- CreateIndex
+CREATE UNIQUE INDEX "users_email_key" ON "users"("email");
+
+-- CreateIndex
+CREATE UNIQUE INDEX "users_google_id_key" ON "users"("google_id");
+
+-- CreateIndex
+CREATE UNIQUE INDEX "songs_deezer_id_key" ON "songs"("deezer_id");
+
+-- CreateIndex
+CREATE INDEX "listens_user_id_played_at_idx" ON "listens"("user_id", "played_at");
+
+-- CreateIndex
+CREATE INDEX "listens_song_id_idx" ON "listens"("song_id");
+
+-- AddForeignKey
+ALTER TABLE "contact_messages" ADD CONSTRAINT "contact_messages_user_id_fkey" FOREIGN KEY ("user_id") REFERENCES "users"("id") ON DELETE SET NULL ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "playlists" ADD CONSTRAINT "playlists_user_id_fkey" FOREIGN KEY ("user_id") REFERENCES "users"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "tracks" ADD CONSTRAINT "tracks_playlist_id_fkey" FOREIGN KEY ("playlist_id") REFERENCES "playlists"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "listens" ADD CONSTRAINT "listens_user_id_fkey" FOREIGN KEY ("user_id") REFERENCES "users"("id") ON DELETE SET NULL ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "listens" ADD CONSTRAINT "listens_song_id_fkey" FOREIGN KEY ("song_id") REFERENCES "songs"("id") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,2 @@
+-- CreateIndex
+CREATE INDEX "listens_played_at_id_idx" ON "listens"("played_at", "id");
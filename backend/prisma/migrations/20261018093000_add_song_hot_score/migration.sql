@@ -0,0 +1,26 @@
+-- AlterTable
+ALTER TABLE "songs" ADD COLUMN "hot_score" DOUBLE PRECISION NOT NULL DEFAULT 0;
+
+-- Backfill from existing listens with the default 48h half-life (epoch 2024-01-01).
+-- hot_score = ln(sum(exp(λ·(played_at - epoch)))); see scripts/db.py. Use the
+-- /api/admin/trending/recompute endpoint after changing TRENDING_HALF_LIFE_HOURS.
+WITH stamped AS (
+    SELECT "song_id", (LN(2) / (48 * 3600.0))::float8 * EXTRACT(EPOCH FROM ("played_at" - TIMESTAMP '2024-01-01 00:00:00'))::float8 AS stamp
+    FROM "listens"
+), peak AS (
+    SELECT "song_id", MAX(stamp) AS m FROM stamped GROUP BY "song_id"
+)
+UPDATE "songs" s
+SET "hot_score" = h.hot
+FROM (
+    SELECT st."song_id", p.m + LN(SUM(EXP(GREATEST(st.stamp - p.m, -700)))) AS hot
+    FROM stamped st JOIN peak p ON p."song_id" = st."song_id"
+    GROUP BY st."song_id", p.m
+) h
+WHERE s."id" = h."song_id";
+
+-- CreateIndex
+CREATE INDEX "songs_hot_score_id_idx" ON "songs"("hot_score", "id");
+
+-- CreateIndex
+CREATE INDEX "songs_genre_hot_score_id_idx" ON "songs"("genre", "hot_score", "id");
@@ -0,0 +1,9 @@
+-- Keyset pagination for GET /api/songs (latest ordering): ORDER BY created_at DESC, id DESC
+-- with WHERE (created_at, id) < (cursor) is a backward range scan on these indexes.
+-- The trending ordering uses songs_hot_score_id_idx / songs_genre_hot_score_id_idx.
+
+-- CreateIndex
+CREATE INDEX "songs_created_at_id_idx" ON "songs"("created_at", "id");
+
+-- CreateIndex
+CREATE INDEX "songs_genre_created_at_id_idx" ON "songs"("genre", "created_at", "id");
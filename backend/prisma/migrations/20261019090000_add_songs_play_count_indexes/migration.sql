@@ -0,0 +1,8 @@
+-- Discover pool refresh (db.get_least_played_ids): ORDER BY play_count, id with
+-- WHERE (play_count, id) >= (min play count, random id) is a forward range scan on these indexes.
+
+-- CreateIndex
+CREATE INDEX "songs_play_count_id_idx" ON "songs"("play_count", "id");
+
+-- CreateIndex
+CREATE INDEX "songs_genre_play_count_id_idx" ON "songs"("genre", "play_count", "id");
@@ -0,0 +1,23 @@
+-- Song search (GET /api/search, db.search_songs): prefix full-text matching on a generated tsvector
+-- (title/artist weighted above album, then genre) plus pg_trgm word similarity on title and artist
+-- for typos. The 'simple' configuration skips stemming and stop words, which suit names better.
+
+-- CreateExtension
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+
+-- AlterTable
+ALTER TABLE "songs" ADD COLUMN "search_vector" tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce("title", '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce("artist", '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce("album", '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce("genre", '')), 'C')
+) STORED;
+
+-- CreateIndex
+CREATE INDEX "songs_search_vector_idx" ON "songs" USING GIN ("search_vector");
+
+-- CreateIndex
+CREATE INDEX "songs_title_trgm_idx" ON "songs" USING GIN ("title" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "songs_artist_trgm_idx" ON "songs" USING GIN ("artist" gin_trgm_ops);
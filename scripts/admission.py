@@ -0,0 +1,62 @@
+"""
+Admission control for the expensive /api/recommend vector path.
+Tracks how many vector recommendations are running and an EWMA of their latency; past either limit,
+try_admit() refuses and the endpoint answers with trending songs marked "degraded" instead, which keeps
+p99 bounded during spikes. While latency is over budget one probe request is let through per
+ADMISSION_PROBE_INTERVAL_SECONDS so the EWMA can see the recovery.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+
+RECOMMEND_MAX_IN_FLIGHT = int(os.getenv("RECOMMEND_MAX_IN_FLIGHT", "32"))
+RECOMMEND_LATENCY_BUDGET_MS = float(os.getenv("RECOMMEND_LATENCY_BUDGET_MS", "500"))
+ADMISSION_EWMA_ALPHA = float(os.getenv("ADMISSION_EWMA_ALPHA", "0.2"))
+ADMISSION_PROBE_INTERVAL_SECONDS = float(os.getenv("ADMISSION_PROBE_INTERVAL_SECONDS", "1.0"))
+
+SHED_IN_FLIGHT = "in_flight"
+SHED_LATENCY = "latency"
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_in_flight: int = RECOMMEND_MAX_IN_FLIGHT,
+        latency_budget_ms: float = RECOMMEND_LATENCY_BUDGET_MS,
+        alpha: float = ADMISSION_EWMA_ALPHA,
+        probe_interval: float = ADMISSION_PROBE_INTERVAL_SECONDS,
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.latency_budget_ms = latency_budget_ms
+        self.alpha = alpha
+        self.probe_interval = probe_interval
+        self.in_flight = 0
+        self.ewma_ms = 0.0
+        self.admitted = 0
+        self._samples = 0
+        self.shed: dict[str, int] = {SHED_IN_FLIGHT: 0, SHED_LATENCY: 0}
+        self._last_probe = float("-inf")
+
+    def try_admit(self) -> str | None:
+        """None if the caller may run the full path (it must call release() afterwards), else the shed reason."""
+        if self.max_in_flight > 0 and self.in_flight >= self.max_in_flight:
+            self.shed[SHED_IN_FLIGHT] += 1
+            return SHED_IN_FLIGHT
+        if self.latency_budget_ms > 0 and self.ewma_ms > self.latency_budget_ms:
+            now = time.monotonic()
+            if now - self._last_probe < self.probe_interval:
+                self.shed[SHED_LATENCY] += 1
+                return SHED_LATENCY
+            self._last_probe = now
+        self.in_flight += 1
+        self.admitted += 1
+        return None
+
+    def release(self, elapsed_seconds: float) -> None:
+        """Record an admitted request's latency and free its slot."""
+        self.in_flight = max(0, self.in_flight - 1)
+        ms = elapsed_seconds * 1000.0
+        self.ewma_ms = ms if self._samples == 0 else self.alpha * ms + (1.0 - self.alpha) * self.ewma_ms
+        self._samples += 1
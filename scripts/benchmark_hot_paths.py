@@ -0,0 +1,264 @@
+"""
+Micro-benchmarks for the vector store, recommender and serialization hot paths, at several catalog
+sizes. Runs offline: songs come from synthetic_data, embeddings from a deterministic fake provider
+(hash of the text, no Gemini calls) and the vector store is a throwaway Chroma collection in a temp dir.
+
+Each benchmark reports the median time per operation over --repeat rounds (timeit, GC off). Results
+are compared with a stored baseline: any benchmark slower than baseline * (1 + --threshold) is listed
+as a regression and the script exits 1. The first run (or --save-baseline) writes the baseline.
+Baselines are machine-specific; compare runs from the same machine.
+
+Usage:
+    python scripts/benchmark_hot_paths.py                                # default sizes, check baseline
+    python scripts/benchmark_hot_paths.py --sizes 1000,10000 --bench recommend_next,similarity_search
+    python scripts/benchmark_hot_paths.py --save-baseline               # accept current numbers
+    python scripts/benchmark_hot_paths.py --threshold 0.1 --out bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+_scripts_dir = Path(__file__).resolve().parent
+if str(_scripts_dir) not in sys.path:
+    sys.path.insert(0, str(_scripts_dir))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from evaluate_recommender import _git_commit
+from recommendation_engine import HISTORY_SIZE, RECOMMEND_K, Recommender, assign_primary_genre
+from synthetic_data import SYNTHETIC_GENRES, generate_catalog
+from vector_store import MusicVectorStore, _song_to_document, build_song_text
+
+DEFAULT_SIZES = (200, 1000, 5000)
+# Machine-specific timings: kept next to this script (git-ignored), not in the working directory
+DEFAULT_BASELINE = str(_scripts_dir / "benchmark_baseline.json")
+# text-embedding-004 vectors
+DEFAULT_DIM = 768
+
+
+class BenchContext:
+    """Catalog, fake embeddings, genre prototypes and (lazily) a populated Chroma store for one size."""
+
+    def __init__(self, size: int, dim: int, seed: int, workdir: str) -> None:
+        self.size = size
+        self.dim = dim
+        self.rng = random.Random(seed)
+        self.catalog = generate_catalog(n_songs=size, dim=dim, seed=seed)
+        self.embeddings = DeterministicFakeEmbedding(size=dim)
+        self.genre_vectors = {g: list(map(float, self.embeddings.embed_query(f"{g} music"))) for g in SYNTHETIC_GENRES}
+        self._workdir = workdir
+        self._store: MusicVectorStore | None = None
+
+    @property
+    def store(self) -> MusicVectorStore:
+        if self._store is None:
+            store = MusicVectorStore(
+                persist_directory=os.path.join(self._workdir, f"chroma_{self.size}"),
+                collection_name=f"bench_{self.size}",
+                embeddings=self.embeddings,
+            )
+            # Chroma rejects more than ~5k records per add
+            for i in range(0, len(self.catalog), 1000):
+                store.add_songs(self.catalog[i:i + 1000])
+            self._store = store
+        return self._store
+
+    def query_vector(self) -> list[float]:
+        return list(map(float, self.embeddings.embed_query(build_song_text(self.rng.choice(self.catalog)))))
+
+
+# name -> factory(ctx) returning the operation to time. Catalog-pass benchmarks process every song once.
+def _bench_build_song_text(ctx: BenchContext) -> Callable[[], Any]:
+    songs = ctx.catalog
+    return lambda: [build_song_text(s) for s in songs]
+
+
+def _bench_song_to_document(ctx: BenchContext) -> Callable[[], Any]:
+    songs = ctx.catalog
+    return lambda: [_song_to_document(s) for s in songs]
+
+
+def _bench_to_recommendation_item(ctx: BenchContext) -> Callable[[], Any]:
+    with contextlib.redirect_stdout(io.StringIO()):
+        from main import _to_recommendation_item
+    songs = ctx.catalog
+    return lambda: [_to_recommendation_item(s) for s in songs]
+
+
+def _bench_assign_primary_genre(ctx: BenchContext) -> Callable[[], Any]:
+    vectors = [s["embedding"] for s in ctx.catalog]
+    genre_vectors = ctx.genre_vectors
+    return lambda: [assign_primary_genre(v, genre_vectors) for v in vectors]
+
+
+def _bench_similarity_search(ctx: BenchContext) -> Callable[[], Any]:
+    store = ctx.store
+    query = ctx.query_vector()
+    return lambda: store.similarity_search_by_vector(query, k=RECOMMEND_K)
+
+
+def _bench_all_songs_with_primary_genre(ctx: BenchContext) -> Callable[[], Any]:
+    store = ctx.store
+    genre_vectors = ctx.genre_vectors
+    return lambda: store.get_all_songs_with_primary_genre(genre_vectors, assign_genre_fn=assign_primary_genre)
+
+
+def _bench_recommend_next(ctx: BenchContext) -> Callable[[], Any]:
+    recommender = Recommender(ctx.store, genre_vectors=ctx.genre_vectors, history_size=HISTORY_SIZE)
+    for song in ctx.rng.sample(ctx.catalog, k=min(HISTORY_SIZE, len(ctx.catalog))):
+        recommender.log_listen(song["id"])
+    return lambda: recommender.recommend_next(k=RECOMMEND_K)
+
+
+BENCHMARKS: dict[str, tuple[Callable[[BenchContext], Callable[[], Any]], bool]] = {
+    # name: (factory, True if one operation is a pass over the whole catalog)
+    "build_song_text": (_bench_build_song_text, True),
+    "song_to_document": (_bench_song_to_document, True),
+    "to_recommendation_item": (_bench_to_recommendation_item, True),
+    "assign_primary_genre": (_bench_assign_primary_genre, True),
+    "similarity_search": (_bench_similarity_search, False),
+    "all_songs_with_primary_genre": (_bench_all_songs_with_primary_genre, False),
+    "recommend_next": (_bench_recommend_next, False),
+}
+
+
+def measure(op: Callable[[], Any], repeat: int, min_round_seconds: float) -> dict[str, float]:
+    """Median / min / stdev seconds per call, each round running op enough times to last min_round_seconds."""
+    timer = timeit.Timer(op)
+    op()  # warm caches and lazy imports
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_round_seconds or number >= 1_000_000:
+            break
+        number = max(number * 2, int(number * min_round_seconds / max(elapsed, 1e-9)))
+    rounds = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "median": statistics.median(rounds),
+        "min": min(rounds),
+        "stdev": statistics.stdev(rounds) if len(rounds) > 1 else 0.0,
+        "number": number,
+    }
+
+
+def run(names: list[str], sizes: list[int], dim: int, repeat: int, min_round_seconds: float, seed: int) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        for size in sizes:
+            ctx = BenchContext(size, dim, seed, workdir)
+            for name in names:
+                factory, per_catalog = BENCHMARKS[name]
+                print(f"  {name} @ {size} songs...", file=sys.stderr)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stats = measure(factory(ctx), repeat, min_round_seconds)
+                entry = {
+                    "benchmark": name,
+                    "songs": size,
+                    "median_ms": round(stats["median"] * 1000, 4),
+                    "min_ms": round(stats["min"] * 1000, 4),
+                    "stdev_ms": round(stats["stdev"] * 1000, 4),
+                    "calls_per_round": stats["number"],
+                }
+                if per_catalog:
+                    entry["per_song_us"] = round(stats["median"] * 1e6 / size, 4)
+                results[f"{name}@{size}"] = entry
+    return results
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[dict[str, Any]]:
+    """Benchmarks whose median is more than threshold slower than the baseline's."""
+    regressions = []
+    for key, entry in results.items():
+        base = baseline.get(key)
+        if not base or not base.get("median_ms"):
+            continue
+        ratio = entry["median_ms"] / base["median_ms"]
+        entry["baseline_median_ms"] = base["median_ms"]
+        entry["change"] = round(ratio - 1.0, 4)
+        if ratio > 1.0 + threshold:
+            regressions.append({"benchmark": key, "baseline_ms": base["median_ms"], "current_ms": entry["median_ms"], "change": entry["change"]})
+    return regressions
+
+
+def _environment(dim: int) -> dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "embedding_dim": dim,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline micro-benchmarks with baseline regression check.")
+    parser.add_argument("--bench", default=",".join(BENCHMARKS), help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="catalog sizes (songs)")
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM, help="fake embedding dimension")
+    parser.add_argument("--repeat", type=int, default=5, help="timed rounds per benchmark")
+    parser.add_argument("--min-round-ms", type=float, default=200.0, help="minimum duration of one round")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare with / write")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--out", help="write the full JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.bench.split(",") if n.strip()]
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    try:
+        sizes = sorted({int(s) for s in args.sizes.split(",") if s.strip()})
+    except ValueError:
+        parser.error("--sizes must be comma-separated integers")
+    if not sizes or min(sizes) < 1 or args.repeat < 1:
+        parser.error("--sizes must be positive and --repeat >= 1")
+
+    print(f"Benchmarking {len(names)} hot paths at {len(sizes)} catalog sizes...", file=sys.stderr)
+    results = run(names, sizes, args.dim, args.repeat, args.min_round_ms / 1000.0, args.seed)
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else None
+    regressions = compare(results, baseline["results"], args.threshold) if baseline and not args.save_baseline else []
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "environment": _environment(args.dim),
+        "baseline": str(baseline_path) if baseline else None,
+        "threshold": args.threshold,
+        "results": results,
+        "regressions": regressions,
+    }
+    if baseline is None or args.save_baseline:
+        baseline_path.write_text(json.dumps({**report, "baseline": None}, indent=2) + "\n", encoding="utf-8")
+        print(f"Saved baseline to {baseline_path}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+        print(f"Wrote {args.out}", file=sys.stderr)
+    else:
+        print(text)
+    for r in regressions:
+        print(f"REGRESSION {r['benchmark']}: {r['baseline_ms']:.4f} ms -> {r['current_ms']:.4f} ms ({r['change']:+.1%})", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
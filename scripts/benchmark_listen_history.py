@@ -0,0 +1,205 @@
+"""
+Benchmark of the listen history query (db.get_listen_history) against the DISTINCT ON query it replaced,
+on users with many listens (default 100k each). Needs Postgres (DATABASE_URL); the data is generated
+server-side in a scratch schema (bench_listen_history, dropped afterwards unless --keep), so the real
+songs/listens tables are never read or written.
+
+Listens are skewed towards a few favourite songs, like real re-listening. For each --limits value both
+queries run --repeat times for one user; the report has p50/p95 latency, buffers touched (EXPLAIN ANALYZE)
+and whether the result equals the user's most recently played distinct songs (GROUP BY reference).
+
+Usage:
+    python scripts/benchmark_listen_history.py                              # 100k listens per user
+    python scripts/benchmark_listen_history.py --listens 1000000 --limits 10,100
+    python scripts/benchmark_listen_history.py --keep --out history.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+_scripts_dir = Path(__file__).resolve().parent
+if str(_scripts_dir) not in sys.path:
+    sys.path.insert(0, str(_scripts_dir))
+
+from dotenv import load_dotenv
+
+from db import HOT_QUERIES, asyncpg
+from evaluate_recommender import _git_commit, _percentile
+
+load_dotenv()
+load_dotenv(dotenv_path=_scripts_dir / ".env")
+load_dotenv(dotenv_path=_scripts_dir.parent / ".env")
+load_dotenv(dotenv_path=_scripts_dir.parent / "backend" / ".env")
+
+SCHEMA = "bench_listen_history"
+
+# The query before the skip-scan: sorts every listen of the user by song id, so LIMIT keeps the
+# alphabetically first songs rather than the most recent ones
+LEGACY_QUERY = """
+    SELECT DISTINCT ON (s.id)
+        s.id, s.deezer_id, s.title, s.artist, s.album, s.genre,
+        s.cover_url, s.preview_url, s.duration, l.played_at
+    FROM listens l
+    JOIN songs s ON l.song_id = s.id
+    WHERE l.user_id = $1
+    ORDER BY s.id, l.played_at DESC
+    LIMIT $2
+"""
+
+QUERIES = {"legacy_distinct_on": LEGACY_QUERY, "skip_scan": HOT_QUERIES["listen_history"]}
+
+# Expected answer: each song's latest listen, newest first
+REFERENCE_QUERY = """
+    SELECT song_id AS id, MAX(played_at) AS played_at FROM listens
+    WHERE user_id = $1
+    GROUP BY song_id
+    ORDER BY played_at DESC, song_id
+    LIMIT $2
+"""
+
+
+async def create_dataset(conn: Any, users: int, listens: int, songs: int, seed: float) -> None:
+    """Scratch copies of songs/listens with the columns and listens index the queries use."""
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+    await conn.execute(f"SET search_path = {SCHEMA}")
+    await conn.execute("SELECT setseed($1)", seed)
+    await conn.execute(
+        """
+        CREATE TABLE songs (
+            id uuid PRIMARY KEY, deezer_id varchar(50), title varchar(255), artist varchar(255),
+            album varchar(255), genre varchar(50), cover_url text, preview_url text, duration int
+        )
+        """
+    )
+    await conn.execute(
+        """
+        INSERT INTO songs
+        SELECT md5('song' || i)::uuid, i::text, 'Song ' || i, 'Artist ' || (i % 500), 'Album ' || (i % 1000),
+               'rock', 'https://example.invalid/' || i || '.jpg', NULL, 180
+        FROM generate_series(1, $1::int) AS i
+        """,
+        songs,
+    )
+    # power(random(), 3) piles most listens onto the first few hundred songs
+    await conn.execute(
+        """
+        CREATE TABLE listens AS
+        SELECT md5('listen' || u || '-' || i)::uuid AS id,
+               md5('user' || u)::uuid AS user_id,
+               md5('song' || (1 + floor($3::int * power(random(), 3)))::int)::uuid AS song_id,
+               TIMESTAMP '2026-01-01' - make_interval(secs => i * 37 + u) AS played_at
+        FROM generate_series(1, $1::int) AS u, generate_series(1, $2::int) AS i
+        """,
+        users, listens, songs,
+    )
+    await conn.execute("ALTER TABLE listens ADD PRIMARY KEY (id)")
+    await conn.execute("CREATE INDEX ON listens (user_id, played_at)")
+    await conn.execute("CREATE INDEX ON listens (song_id)")
+    await conn.execute("ANALYZE songs")
+    await conn.execute("ANALYZE listens")
+
+
+def _buffers(plan: dict[str, Any]) -> int:
+    return int(plan.get("Shared Hit Blocks", 0)) + int(plan.get("Shared Read Blocks", 0))
+
+
+async def run_query(conn: Any, sql: str, user_id: str, limit: int, repeat: int) -> dict[str, Any]:
+    await conn.fetch(sql, user_id, limit)  # warm the cache and the prepared statement
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = await conn.fetch(sql, user_id, limit)
+        times.append((time.perf_counter() - start) * 1000.0)
+    times.sort()
+    explain = await conn.fetchval(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", user_id, limit)
+    plan = (json.loads(explain) if isinstance(explain, str) else explain)[0]
+    return {
+        "rows": rows,
+        "p50_ms": round(_percentile(times, 50), 3),
+        "p95_ms": round(_percentile(times, 95), 3),
+        "mean_ms": round(statistics.fmean(times), 3),
+        "buffers": _buffers(plan["Plan"]),
+        "execution_ms": round(float(plan.get("Execution Time", 0.0)), 3),
+    }
+
+
+async def run(args: argparse.Namespace, limits: list[int]) -> dict[str, Any]:
+    database_url = os.getenv("DATABASE_URL") or os.getenv("BACKEND_DATABASE_URL")
+    if asyncpg is None or not database_url:
+        raise SystemExit("ERROR: needs asyncpg and DATABASE_URL (see scripts/.env.example)")
+    conn = await asyncpg.connect(database_url)
+    try:
+        print(f"Generating {args.users} users x {args.listens} listens over {args.songs} songs...", file=sys.stderr)
+        start = time.perf_counter()
+        await create_dataset(conn, args.users, args.listens, args.songs, args.seed)
+        print(f"  done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        user_id = await conn.fetchval("SELECT md5('user1')::uuid")
+        results: dict[str, Any] = {}
+        for limit in limits:
+            expected = [str(r["id"]) for r in await conn.fetch(REFERENCE_QUERY, user_id, limit)]
+            entry: dict[str, Any] = {}
+            for name, sql in QUERIES.items():
+                print(f"  {name} limit={limit}...", file=sys.stderr)
+                stats = await run_query(conn, sql, user_id, limit, args.repeat)
+                rows = stats.pop("rows")
+                stats["matches_expected"] = [str(r["id"]) for r in rows] == expected
+                entry[name] = stats
+            legacy, new = entry["legacy_distinct_on"], entry["skip_scan"]
+            entry["speedup_p50"] = round(legacy["p50_ms"] / new["p50_ms"], 2) if new["p50_ms"] else None
+            results[f"limit={limit}"] = entry
+        return results
+    finally:
+        if not args.keep:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the listen history query on users with many listens.")
+    parser.add_argument("--users", type=int, default=3, help="users generated (user 1 is measured)")
+    parser.add_argument("--listens", type=int, default=100_000, help="listens per user")
+    parser.add_argument("--songs", type=int, default=20_000, help="catalog size")
+    parser.add_argument("--limits", default="10,50", help="comma-separated history sizes to query")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per query")
+    parser.add_argument("--seed", type=float, default=0.42, help="setseed() value in [-1, 1]")
+    parser.add_argument("--keep", action="store_true", help=f"keep the {SCHEMA} schema afterwards")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    try:
+        limits = [int(x) for x in args.limits.split(",") if x.strip()]
+    except ValueError:
+        parser.error("--limits must be comma-separated integers")
+    if not limits or min(limits) < 1 or args.users < 1 or args.listens < 1 or args.songs < 1 or args.repeat < 1:
+        parser.error("--limits, --users, --listens, --songs and --repeat must be positive")
+    if not -1.0 <= args.seed <= 1.0:
+        parser.error("--seed must be in [-1, 1]")
+
+    results = asyncio.run(run(args, limits))
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "dataset": {"users": args.users, "listens_per_user": args.listens, "songs": args.songs},
+        "repeat": args.repeat,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+        print(f"Wrote {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Catalog export as NDJSON or Arrow IPC, streamed batch by batch from db.iter_songs.
+Used by GET /api/admin/export and scripts/export_catalog.py. Only one batch of songs (plus its
+embeddings) is in memory at a time. Arrow output needs pyarrow (optional dependency).
+"""
+
+from __future__ import annotations
+
+import io
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable
+from uuid import UUID
+
+from serialization import dumps
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None  # type: ignore[assignment]
+
+EXPORT_FORMATS = ("ndjson", "arrow")
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# song_ids -> {song_id: embedding}, e.g. AsyncVectorStore.get_embeddings_for_songs
+EmbeddingsFn = Callable[[list[str]], Awaitable[dict[str, list[float]]]]
+
+
+def _json_line(song: dict[str, Any]) -> bytes:
+    return dumps({k: v.isoformat() if isinstance(v, datetime) else v for k, v in song.items()})
+
+
+async def song_batches(
+    batches: AsyncIterator[list[Any]],
+    embeddings: EmbeddingsFn | None = None,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Turn record batches into dicts with string ids; with embeddings, add an "embedding" key (None if not indexed)."""
+    async for rows in batches:
+        songs = [{k: str(v) if isinstance(v, UUID) else v for k, v in dict(row).items()} for row in rows]
+        if embeddings is not None:
+            vectors = await embeddings([s["id"] for s in songs])
+            for song in songs:
+                song["embedding"] = vectors.get(song["id"])
+        yield songs
+
+
+async def ndjson_chunks(batches: AsyncIterator[list[dict[str, Any]]]) -> AsyncIterator[bytes]:
+    """One JSON object per line; one chunk per batch."""
+    async for songs in batches:
+        if songs:
+            yield b"\n".join(_json_line(song) for song in songs) + b"\n"
+
+
+def _arrow_schema(with_embeddings: bool) -> Any:
+    fields = [
+        pa.field("id", pa.string()),
+        pa.field("deezer_id", pa.string()),
+        pa.field("title", pa.string()),
+        pa.field("artist", pa.string()),
+        pa.field("album", pa.string()),
+        pa.field("genre", pa.string()),
+        pa.field("cover_url", pa.string()),
+        pa.field("preview_url", pa.string()),
+        pa.field("duration", pa.int32()),
+        pa.field("play_count", pa.int64()),
+        pa.field("hot_score", pa.float64()),
+        pa.field("last_played_at", pa.timestamp("us")),
+        pa.field("created_at", pa.timestamp("us")),
+        pa.field("updated_at", pa.timestamp("us")),
+    ]
+    if with_embeddings:
+        fields.append(pa.field("embedding", pa.list_(pa.float32())))
+    return pa.schema(fields)
+
+
+async def arrow_chunks(batches: AsyncIterator[list[dict[str, Any]]], with_embeddings: bool = False) -> AsyncIterator[bytes]:
+    """Arrow IPC stream: the schema message, then one record batch per song batch, then end-of-stream."""
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed. Install with: pip install pyarrow")
+    schema = _arrow_schema(with_embeddings)
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+
+    def drain() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    try:
+        async for songs in batches:
+            if songs:
+                writer.write_batch(pa.RecordBatch.from_pylist(songs, schema=schema))
+                yield drain()
+    finally:
+        writer.close()
+    yield drain()
+
+
+def export_chunks(
+    batches: AsyncIterator[list[Any]],
+    fmt: str = "ndjson",
+    embeddings: EmbeddingsFn | None = None,
+) -> AsyncIterator[bytes]:
+    """Encoded export stream for record batches from db.iter_songs."""
+    songs = song_batches(batches, embeddings)
+    if fmt == "arrow":
+        return arrow_chunks(songs, with_embeddings=embeddings is not None)
+    return ndjson_chunks(songs)
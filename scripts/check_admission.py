@@ -0,0 +1,106 @@
+"""
+Check the /api/recommend load shedding (admission.AdmissionController) directly: in-flight limit, latency
+budget with its recovery probe, disabled limits and shed counters. /api/recommend only reaches the
+admission check with a listen history, which anonymous requests (and so load_test.py) never have, so
+this drives try_admit()/release() on their own. Prints each check and exits 1 if any fails.
+
+Usage:
+    python scripts/check_admission.py
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Callable
+
+_scripts_dir = Path(__file__).resolve().parent
+if str(_scripts_dir) not in sys.path:
+    sys.path.insert(0, str(_scripts_dir))
+
+from admission import SHED_IN_FLIGHT, SHED_LATENCY, AdmissionController
+
+
+def _expect(condition: bool, message: str) -> None:
+    # Not assert: the checks must also run under python -O
+    if not condition:
+        raise AssertionError(message)
+
+
+def check_in_flight_limit() -> None:
+    ctrl = AdmissionController(max_in_flight=2, latency_budget_ms=0)
+    _expect(ctrl.try_admit() is None and ctrl.try_admit() is None, "requests under the limit must be admitted")
+    _expect(ctrl.try_admit() == SHED_IN_FLIGHT, "third concurrent request must be shed")
+    ctrl.release(0.01)
+    _expect(ctrl.in_flight == 1, f"release() must free one slot, in_flight={ctrl.in_flight}")
+    _expect(ctrl.try_admit() is None, "a released slot must be reusable")
+    _expect(ctrl.shed == {SHED_IN_FLIGHT: 1, SHED_LATENCY: 0} and ctrl.admitted == 3, f"counters off: shed={ctrl.shed} admitted={ctrl.admitted}")
+
+
+def check_latency_budget() -> None:
+    # Probe interval far beyond the check's runtime: only the first over-budget request gets through
+    ctrl = AdmissionController(max_in_flight=0, latency_budget_ms=100, alpha=0.5, probe_interval=3600)
+    _expect(ctrl.try_admit() is None, "the first request must be admitted")
+    ctrl.release(0.3)
+    _expect(ctrl.ewma_ms == 300.0, "the first sample seeds the EWMA")
+    _expect(ctrl.try_admit() is None, "one probe is let through while over budget")
+    _expect(ctrl.try_admit() == SHED_LATENCY, "further requests inside the probe interval are shed")
+    ctrl.release(0.01)
+    _expect(abs(ctrl.ewma_ms - 155.0) < 1e-9, "EWMA must blend with alpha")
+    _expect(ctrl.try_admit() == SHED_LATENCY, "still over budget after one fast probe")
+    _expect(ctrl.shed[SHED_LATENCY] == 2 and ctrl.in_flight == 0, f"counters off: shed={ctrl.shed} in_flight={ctrl.in_flight}")
+
+
+def check_latency_recovery() -> None:
+    # With no probe interval every request is a probe; fast probes pull the EWMA back under budget
+    ctrl = AdmissionController(max_in_flight=0, latency_budget_ms=100, alpha=0.5, probe_interval=0)
+    _expect(ctrl.try_admit() is None, "the first request must be admitted")
+    ctrl.release(0.4)
+    for _ in range(3):
+        _expect(ctrl.try_admit() is None, "with probe_interval=0 every request is a probe")
+        ctrl.release(0.01)
+    _expect(ctrl.ewma_ms < 100, f"EWMA should have recovered, got {ctrl.ewma_ms}")
+    _expect(ctrl.try_admit() is None and ctrl.shed == {SHED_IN_FLIGHT: 0, SHED_LATENCY: 0}, "nothing is shed once back under budget")
+
+
+def check_disabled_limits() -> None:
+    ctrl = AdmissionController(max_in_flight=0, latency_budget_ms=0)
+    for _ in range(100):
+        _expect(ctrl.try_admit() is None, "max_in_flight=0 never sheds")
+    ctrl.release(10.0)
+    _expect(ctrl.try_admit() is None, "limits of 0 never shed")
+    _expect(ctrl.in_flight == 100, f"in_flight={ctrl.in_flight}, expected 100")
+
+
+def check_release_floor() -> None:
+    ctrl = AdmissionController(max_in_flight=1, latency_budget_ms=0)
+    ctrl.release(0.01)
+    _expect(ctrl.in_flight == 0, "an unmatched release must not go negative")
+    _expect(ctrl.try_admit() is None and ctrl.try_admit() == SHED_IN_FLIGHT, "the limit must still hold after an unmatched release")
+
+
+CHECKS: list[Callable[[], None]] = [
+    check_in_flight_limit,
+    check_latency_budget,
+    check_latency_recovery,
+    check_disabled_limits,
+    check_release_floor,
+]
+
+
+def main() -> None:
+    failed = 0
+    for check in CHECKS:
+        try:
+            check()
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL {check.__name__}: {e}")
+        else:
+            print(f"ok   {check.__name__}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Item-item co-listen model built incrementally from the Postgres `listens` table.
+Listens by the same user within SESSION_GAP_SECONDS form a session; songs played close
+together in a session are counted as co-listened. Each update costs O(new listens).
+The model is guarded by a lock, so updates and scoring can run on different worker threads.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import heapq
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Mapping
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+log = logging.getLogger("colisten")
+
+# Next to the genre vector cache in scripts/music_db, whatever the working directory
+COLISTEN_PATH = os.getenv("COLISTEN_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "music_db", "colisten_model.npz"))
+TOP_NEIGHBOURS = int(os.getenv("COLISTEN_TOP_NEIGHBOURS", "50"))
+SESSION_GAP_SECONDS = int(os.getenv("COLISTEN_SESSION_GAP_SECONDS", "1800"))
+# How many previous songs in a session a new listen is paired with.
+SESSION_WINDOW = int(os.getenv("COLISTEN_SESSION_WINDOW", "10"))
+# Rows are pruned back to 2 * TOP_NEIGHBOURS once they grow past this many entries.
+MAX_ROW_SIZE = 4 * TOP_NEIGHBOURS
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _as_utc(ts: datetime) -> datetime:
+    return ts if ts.tzinfo is not None else ts.replace(tzinfo=timezone.utc)
+
+
+def _to_epoch_us(ts: datetime) -> int:
+    # Integer microseconds so the watermark round-trips exactly through the snapshot.
+    return (_as_utc(ts) - _EPOCH) // timedelta(microseconds=1)
+
+
+class CoListenModel:
+    """
+    Sparse, symmetric co-occurrence counts between songs plus a cached top-N neighbour list per song.
+    Feed it listens in played_at order via add_listens(); watermark records the last listen consumed.
+    """
+
+    def __init__(
+        self,
+        top_k: int = TOP_NEIGHBOURS,
+        session_gap_seconds: int = SESSION_GAP_SECONDS,
+        session_window: int = SESSION_WINDOW,
+        max_row_size: int = MAX_ROW_SIZE,
+    ) -> None:
+        self._top_k = top_k
+        self._session_gap = session_gap_seconds
+        self._session_window = session_window
+        self._max_row_size = max(max_row_size, 2 * top_k)
+        self._rows: dict[str, dict[str, float]] = {}
+        self._top: dict[str, list[tuple[str, float]]] = {}
+        # user_id -> (last played_at, recent song ids); ordered by last activity so idle sessions expire from the front.
+        self._sessions: OrderedDict[str, tuple[datetime, deque[str]]] = OrderedDict()
+        self.watermark: tuple[datetime, str] | None = None
+        self.listens_seen = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add_listens(self, listens: Iterable[Mapping[str, Any]]) -> int:
+        """
+        Consume listen rows (user_id, song_id, played_at, id) in played_at order.
+        Anonymous listens advance the watermark but cannot be sessionized. Returns rows consumed.
+        """
+        n = 0
+        with self._lock:
+            for row in listens:
+                n += 1
+                played_at = _as_utc(row["played_at"])
+                self.watermark = (played_at, str(row.get("id") or ""))
+                user_id = row.get("user_id")
+                song_id = row.get("song_id")
+                if user_id is None or song_id is None:
+                    continue
+                self._observe(str(user_id), str(song_id), played_at)
+            self.listens_seen += n
+        return n
+
+    def _observe(self, user_id: str, song_id: str, played_at: datetime) -> None:
+        self._expire_sessions(played_at)
+        session = self._sessions.pop(user_id, None)
+        recent: deque[str]
+        if session is None or (played_at - session[0]).total_seconds() > self._session_gap:
+            recent = deque(maxlen=self._session_window)
+        else:
+            recent = session[1]
+        # Closer songs in the session count more: 1 for the previous song, 1/2 for the one before, ...
+        for distance, other in enumerate(reversed(recent), start=1):
+            if other != song_id:
+                self._bump(song_id, other, 1.0 / distance)
+                self._bump(other, song_id, 1.0 / distance)
+        recent.append(song_id)
+        self._sessions[user_id] = (played_at, recent)
+
+    def _expire_sessions(self, now: datetime) -> None:
+        while self._sessions:
+            user_id, (last, _) = next(iter(self._sessions.items()))
+            if (now - last).total_seconds() <= self._session_gap:
+                break
+            self._sessions.pop(user_id)
+
+    def _bump(self, song_id: str, other: str, weight: float) -> None:
+        row = self._rows.setdefault(song_id, {})
+        row[other] = row.get(other, 0.0) + weight
+        self._top.pop(song_id, None)
+        if len(row) > self._max_row_size:
+            keep = heapq.nlargest(2 * self._top_k, row.items(), key=lambda kv: kv[1])
+            self._rows[song_id] = dict(keep)
+
+    def neighbours(self, song_id: Any, k: int | None = None) -> list[tuple[str, float]]:
+        """Return up to k (song_id, weight) pairs most often co-listened with song_id, best first."""
+        with self._lock:
+            return self._neighbours(str(song_id), k)
+
+    def _neighbours(self, sid: str, k: int | None = None) -> list[tuple[str, float]]:
+        top = self._top.get(sid)
+        if top is None:
+            row = self._rows.get(sid)
+            if not row:
+                return []
+            top = heapq.nlargest(self._top_k, row.items(), key=lambda kv: kv[1])
+            self._top[sid] = top
+        return top[:k] if k is not None else list(top)
+
+    def score_candidates(self, seed_ids: Iterable[Any], k: int | None = None) -> dict[str, float]:
+        """
+        Aggregate neighbour weights over seed songs (most recent first; later seeds count less).
+        Seeds themselves are excluded from the result.
+        """
+        seeds = [str(s) for s in seed_ids]
+        seed_set = set(seeds)
+        scores: dict[str, float] = {}
+        with self._lock:
+            for rank, sid in enumerate(seeds):
+                recency = 1.0 / (1 + rank)
+                for other, weight in self._neighbours(sid):
+                    if other in seed_set:
+                        continue
+                    scores[other] = scores.get(other, 0.0) + recency * weight
+        if k is not None and len(scores) > k:
+            scores = dict(heapq.nlargest(k, scores.items(), key=lambda kv: kv[1]))
+        return scores
+
+    def save(self, path: str | None = None) -> bool:
+        """
+        Persist the top-N neighbour lists as CSR-style arrays (ids, indptr, indices, data) plus the watermark.
+        Written to a temporary file and renamed over `path` (default COLISTEN_PATH), so a crash mid-save leaves
+        the previous snapshot.
+        """
+        if np is None:
+            log.warning("numpy not available, skipping co-listen snapshot")
+            return False
+        path = path or COLISTEN_PATH
+        indptr = [0]
+        indices: list[int] = []
+        data: list[float] = []
+        with self._lock:
+            ids = list(self._rows)
+            index = {sid: i for i, sid in enumerate(ids)}
+            for sid in ids:
+                for other, weight in self._neighbours(sid):
+                    j = index.get(other)
+                    if j is None:
+                        continue
+                    indices.append(j)
+                    data.append(weight)
+                indptr.append(len(indices))
+            wm_ts, wm_id = self.watermark if self.watermark else (None, "")
+            listens_seen = self.listens_seen
+        tmp = path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(tmp, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    ids=np.array(ids, dtype=np.str_),
+                    indptr=np.array(indptr, dtype=np.int64),
+                    indices=np.array(indices, dtype=np.int32),
+                    data=np.array(data, dtype=np.float32),
+                    watermark_us=np.array([_to_epoch_us(wm_ts) if wm_ts else -1], dtype=np.int64),
+                    watermark_id=np.array([wm_id], dtype=np.str_),
+                    listens_seen=np.array([listens_seen], dtype=np.int64),
+                )
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except Exception as e:
+            log.warning("Co-listen snapshot save failed: %s", e)
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            return False
+        log.info("Saved co-listen snapshot: %d songs, %d edges", len(ids), len(indices))
+        return True
+
+    @classmethod
+    def load(cls, path: str | None = None, **kwargs: Any) -> "CoListenModel":
+        """Load a snapshot written by save() (default COLISTEN_PATH); returns an empty model if missing or unreadable."""
+        path = path or COLISTEN_PATH
+        model = cls(**kwargs)
+        if np is None or not os.path.exists(path):
+            return model
+        try:
+            with np.load(path, allow_pickle=False) as snap:
+                ids = [str(s) for s in snap["ids"]]
+                indptr = snap["indptr"]
+                indices = snap["indices"]
+                data = snap["data"]
+                for i, sid in enumerate(ids):
+                    start, end = int(indptr[i]), int(indptr[i + 1])
+                    if start < end:
+                        model._rows[sid] = {ids[int(j)]: float(w) for j, w in zip(indices[start:end], data[start:end])}
+                us = int(snap["watermark_us"][0])
+                if us >= 0:
+                    model.watermark = (_EPOCH + timedelta(microseconds=us), str(snap["watermark_id"][0]))
+                model.listens_seen = int(snap["listens_seen"][0])
+        except Exception as e:
+            log.warning("Co-listen snapshot load failed (%s), starting empty: %s", path, e)
+            return cls(**kwargs)
+        log.info("Loaded co-listen snapshot: %d songs, watermark=%s", len(model), model.watermark)
+        return model
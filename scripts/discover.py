@@ -0,0 +1,139 @@
+"""
+Discover sampling without sorting the songs table per request. Per genre, an in-memory pool of the
+least-played song ids (db.get_least_played_ids) is kept for DISCOVER_POOL_TTL seconds and refreshed in
+the background once stale; each request samples ids from the pool and hydrates them through the song
+row cache. With a session id, every session walks its own shuffle of the pool and never gets the same
+song twice until it has seen the whole pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import OrderedDict
+from typing import Any
+
+import db
+
+log = logging.getLogger("discover")
+
+DISCOVER_POOL_SIZE = int(os.getenv("DISCOVER_POOL_SIZE", "500"))
+DISCOVER_POOL_TTL = float(os.getenv("DISCOVER_POOL_TTL", "300"))
+# Sessions idle for longer than this start a fresh shuffle
+DISCOVER_SESSION_TTL = float(os.getenv("DISCOVER_SESSION_TTL", "1800"))
+DISCOVER_MAX_SESSIONS = int(os.getenv("DISCOVER_MAX_SESSIONS", "10000"))
+# genre comes straight from the query string; least recently used pools are dropped past this many
+DISCOVER_MAX_POOLS = int(os.getenv("DISCOVER_MAX_POOLS", "64"))
+
+
+class _Pool:
+    __slots__ = ("ids", "loaded_at", "refreshing")
+
+    def __init__(self) -> None:
+        self.ids: list[str] = []
+        self.loaded_at = 0.0
+        self.refreshing: asyncio.Task | None = None
+
+
+class _Session:
+    __slots__ = ("served", "seen_at")
+
+    def __init__(self) -> None:
+        self.served: set[str] = set()
+        self.seen_at = time.monotonic()
+
+
+class DiscoverSampler:
+    """sample(genre, limit, session) -> song rows. Pools are per genre (None = all genres)."""
+
+    def __init__(
+        self,
+        pool_size: int = DISCOVER_POOL_SIZE,
+        pool_ttl: float = DISCOVER_POOL_TTL,
+        session_ttl: float = DISCOVER_SESSION_TTL,
+        max_sessions: int = DISCOVER_MAX_SESSIONS,
+        max_pools: int = DISCOVER_MAX_POOLS,
+    ) -> None:
+        self.pool_size = pool_size
+        self.pool_ttl = pool_ttl
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.max_pools = max_pools
+        self._pools: OrderedDict[str | None, _Pool] = OrderedDict()
+        self._sessions: OrderedDict[tuple[str, str | None], _Session] = OrderedDict()
+        self.refreshes = 0
+
+    def pool_sizes(self) -> dict[str, int]:
+        return {genre or "all": len(p.ids) for genre, p in self._pools.items()}
+
+    def clear(self) -> None:
+        """Drop every pool (e.g. after an ingestion) so the next request reloads it."""
+        self._pools.clear()
+
+    async def _refresh(self, genre: str | None, pool: _Pool) -> None:
+        try:
+            ids = await db.get_least_played_ids(genre, self.pool_size)
+            # An empty read (no songs, or the query failed) keeps the old pool and is retried next request
+            if ids:
+                pool.ids = ids
+                pool.loaded_at = time.monotonic()
+                self.refreshes += 1
+        except Exception as e:
+            log.exception("Discover pool refresh failed (genre=%s): %s", genre or "all", e)
+        finally:
+            pool.refreshing = None
+
+    async def _pool_ids(self, genre: str | None) -> list[str]:
+        pool = self._pools.get(genre)
+        if pool is None:
+            pool = self._pools[genre] = _Pool()
+            while len(self._pools) > self.max_pools:
+                self._pools.popitem(last=False)
+        self._pools.move_to_end(genre)
+        stale = time.monotonic() - pool.loaded_at >= self.pool_ttl
+        if stale and pool.refreshing is None:
+            pool.refreshing = asyncio.create_task(self._refresh(genre, pool))
+        # Only the first load (or a pool that came back empty) is awaited; stale pools refresh in the background
+        if not pool.ids and pool.refreshing is not None:
+            await asyncio.shield(pool.refreshing)
+        return pool.ids
+
+    def _session(self, session: str, genre: str | None) -> _Session:
+        key = (session, genre)
+        now = time.monotonic()
+        state = self._sessions.get(key)
+        if state is None or now - state.seen_at > self.session_ttl:
+            state = self._sessions[key] = _Session()
+        state.seen_at = now
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return state
+
+    async def sample(self, genre: str | None = None, limit: int = 20, session: str | None = None) -> list[dict[str, Any]]:
+        """
+        Up to `limit` random songs from the genre's least-played pool. With a session, songs already
+        served to it are skipped; once the whole pool has been served the session starts over.
+        """
+        ids = await self._pool_ids(genre)
+        if not ids or limit <= 0:
+            return []
+        if session:
+            state = self._session(session, genre)
+            fresh = [sid for sid in ids if sid not in state.served]
+            picked = random.sample(fresh, min(limit, len(fresh)))
+            if len(picked) < limit:
+                # Whole pool served: start the session over, without repeating this page
+                state.served = set(picked)
+                rest = [sid for sid in ids if sid not in state.served]
+                picked += random.sample(rest, min(limit - len(picked), len(rest)))
+            state.served.update(picked)
+        else:
+            picked = random.sample(ids, min(limit, len(ids)))
+        return await db.get_songs_by_ids(picked)
+
+
+DISCOVER = DiscoverSampler()
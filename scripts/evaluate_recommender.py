@@ -0,0 +1,278 @@
+"""
+Offline evaluation harness for the recommender.
+Replays listen sequences (synthetic, or read from a Postgres database such as a restored dump) in time
+order: the first part trains the co-listen model and popularity counts, then every later listen is a
+next-song prediction task for the user's recent history. Each configuration reports recall@k, NDCG@k,
+catalog coverage, intra-list diversity, p50/p95/p99 latency and peak RSS as JSON.
+
+Usage:
+    python scripts/evaluate_recommender.py                                  # synthetic data, all configs
+    python scripts/evaluate_recommender.py --songs 5000 --users 1000        # bigger synthetic run
+    python scripts/evaluate_recommender.py --source postgres                # songs/listens from DATABASE_URL
+    python scripts/evaluate_recommender.py --configs vector,hybrid --out eval.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import subprocess
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+_scripts_dir = Path(__file__).resolve().parent
+if str(_scripts_dir) not in sys.path:
+    sys.path.insert(0, str(_scripts_dir))
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+from colisten import CoListenModel
+from recommendation_engine import COLISTEN_WEIGHT, HISTORY_SIZE, RECOMMEND_K, Recommender
+
+# name -> how to rank. "popularity" is the trending-style baseline the API falls back to.
+CONFIGS: dict[str, dict[str, Any]] = {
+    "popularity": {"kind": "popularity"},
+    "vector": {"kind": "recommender", "colisten_weight": 0.0},
+    "hybrid": {"kind": "recommender", "colisten_weight": COLISTEN_WEIGHT},
+    "colisten-heavy": {"kind": "recommender", "colisten_weight": 0.7},
+}
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=_scripts_dir, capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def load_synthetic(args: argparse.Namespace) -> dict[str, Any]:
+    from synthetic_data import generate_catalog, generate_listens
+
+    catalog = generate_catalog(n_songs=args.songs, seed=args.seed)
+    listens = generate_listens(
+        catalog,
+        n_users=args.users,
+        sessions_per_user=args.sessions,
+        session_length=args.session_length,
+        seed=args.seed,
+    )
+    return {"source": "synthetic", "catalog": catalog, "listens": listens}
+
+
+async def _load_postgres(max_listens: int) -> dict[str, Any]:
+    from db import close_db_pool, get_db_pool, get_listens_since, get_songs
+
+    if not await get_db_pool():
+        raise SystemExit("ERROR: Failed to connect to database. Check DATABASE_URL in .env")
+    try:
+        listens: list[dict[str, Any]] = []
+        watermark = None
+        while len(listens) < max_listens:
+            rows = await get_listens_since(watermark, limit=min(5000, max_listens - len(listens)))
+            if not rows:
+                break
+            listens.extend(rows)
+            watermark = (rows[-1]["played_at"], str(rows[-1]["id"]))
+        catalog = await get_songs(limit=1_000_000)
+    finally:
+        await close_db_pool()
+    for row in listens:
+        row["user_id"] = str(row["user_id"]) if row.get("user_id") is not None else None
+        row["song_id"] = str(row["song_id"])
+        row["id"] = str(row["id"])
+    return {"source": "postgres", "catalog": [dict(s, id=str(s["id"])) for s in catalog], "listens": listens}
+
+
+def load_postgres(args: argparse.Namespace) -> dict[str, Any]:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    load_dotenv(dotenv_path=_scripts_dir / ".env")
+    load_dotenv(dotenv_path=_scripts_dir.parent / ".env")
+    load_dotenv(dotenv_path=_scripts_dir.parent / "backend" / ".env")
+    return asyncio.run(_load_postgres(args.max_listens))
+
+
+def _build_store(dataset: dict[str, Any]) -> Any:
+    if dataset["source"] == "synthetic":
+        from synthetic_data import SyntheticVectorStore
+
+        return SyntheticVectorStore(dataset["catalog"])
+    from vector_store import MusicVectorStore
+
+    return MusicVectorStore()
+
+
+def run_config(name: str, config: dict[str, Any], dataset: dict[str, Any], options: dict[str, Any]) -> dict[str, Any]:
+    """Replay the dataset through one configuration and return its metrics."""
+    k = options["k"]
+    listens = dataset["listens"]
+    split = int(len(listens) * options["train_fraction"])
+    train, test = listens[:split], listens[split:]
+    if options["max_events"]:
+        test = test[: options["max_events"]]
+
+    store = _build_store(dataset) if config["kind"] == "recommender" else None
+    colisten = CoListenModel()
+    colisten.add_listens(train)
+    popularity: Counter[str] = Counter(row["song_id"] for row in train)
+    histories: dict[Any, deque[str]] = {}
+    for row in train:
+        histories.setdefault(row["user_id"], deque(maxlen=HISTORY_SIZE)).append(row["song_id"])
+
+    embedding_cache: dict[str, np.ndarray | None] = {}
+
+    def unit_embedding(song_id: str) -> np.ndarray | None:
+        if song_id not in embedding_cache:
+            emb = store.get_embedding_for_song(song_id) if store is not None else None
+            if emb is None:
+                embedding_cache[song_id] = None
+            else:
+                vec = np.asarray(emb, dtype=np.float64)
+                norm = np.linalg.norm(vec)
+                embedding_cache[song_id] = vec / norm if norm else None
+        return embedding_cache[song_id]
+
+    latencies: list[float] = []
+    hits = 0
+    ndcg = 0.0
+    recommended: set[str] = set()
+    diversity_sum = 0.0
+    diversity_n = 0
+    events = 0
+    for row in test:
+        user_id, target = row["user_id"], row["song_id"]
+        history = histories.setdefault(user_id, deque(maxlen=HISTORY_SIZE))
+        if user_id is not None and history:
+            start = time.perf_counter()
+            if config["kind"] == "popularity":
+                seen = set(history)
+                ids = [sid for sid, _ in popularity.most_common(k + len(seen)) if sid not in seen][:k]
+            else:
+                rec = Recommender(store, history_size=HISTORY_SIZE, colisten=colisten, colisten_weight=config["colisten_weight"])
+                for sid in history:
+                    rec.log_listen(sid)
+                ids = [str(s.get("id")) for s in rec.recommend_next(k=k)]
+            latencies.append((time.perf_counter() - start) * 1000.0)
+            events += 1
+            recommended.update(ids)
+            if target in ids:
+                hits += 1
+                ndcg += 1.0 / math.log2(ids.index(target) + 2)
+            vectors = [v for v in (unit_embedding(sid) for sid in ids) if v is not None]
+            if len(vectors) >= 2:
+                m = np.vstack(vectors)
+                sims = m @ m.T
+                n = len(vectors)
+                diversity_sum += 1.0 - (sims.sum() - n) / (n * (n - 1))
+                diversity_n += 1
+        history.append(target)
+        colisten.add_listens([row])
+        popularity[target] += 1
+
+    latencies.sort()
+    catalog_size = len(dataset["catalog"]) or 1
+    return {
+        "params": config,
+        "events": events,
+        f"recall_at_{k}": round(hits / events, 4) if events else 0.0,
+        f"ndcg_at_{k}": round(ndcg / events, 4) if events else 0.0,
+        "catalog_coverage": round(len(recommended) / catalog_size, 4),
+        "diversity": round(diversity_sum / diversity_n, 4) if diversity_n else None,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50), 3),
+            "p95": round(_percentile(latencies, 95), 3),
+            "p99": round(_percentile(latencies, 99), 3),
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        },
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline recommendation quality and latency evaluation.")
+    parser.add_argument("--source", choices=["synthetic", "postgres"], default="synthetic")
+    parser.add_argument("--configs", default=",".join(CONFIGS), help=f"comma-separated subset of: {', '.join(CONFIGS)}")
+    parser.add_argument("--k", type=int, default=RECOMMEND_K)
+    parser.add_argument("--train-fraction", type=float, default=0.8)
+    parser.add_argument("--max-events", type=int, default=2000, help="cap on evaluated test listens (0 = all)")
+    parser.add_argument("--max-listens", type=int, default=1_000_000, help="postgres: cap on listens read")
+    parser.add_argument("--songs", type=int, default=1000, help="synthetic: catalog size")
+    parser.add_argument("--users", type=int, default=200, help="synthetic: number of users")
+    parser.add_argument("--sessions", type=int, default=5, help="synthetic: sessions per user")
+    parser.add_argument("--session-length", type=int, default=8, help="synthetic: listens per session")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-isolate", action="store_true", help="run configs in this process (peak RSS becomes cumulative)")
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.configs.split(",") if n.strip()]
+    unknown = [n for n in names if n not in CONFIGS]
+    if unknown:
+        parser.error(f"unknown config(s): {', '.join(unknown)}")
+
+    dataset = load_synthetic(args) if args.source == "synthetic" else load_postgres(args)
+    options = {"k": args.k, "train_fraction": args.train_fraction, "max_events": args.max_events}
+    results: dict[str, Any] = {}
+    for name in names:
+        print(f"Evaluating {name}...", file=sys.stderr)
+        if args.no_isolate:
+            results[name] = run_config(name, CONFIGS[name], dataset, options)
+        else:
+            # Fresh process per config so peak RSS is attributable to that config alone
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                results[name] = pool.submit(run_config, name, CONFIGS[name], dataset, options).result()
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "source": dataset["source"],
+        "dataset": {
+            "songs": len(dataset["catalog"]),
+            "listens": len(dataset["listens"]),
+            "users": len({row["user_id"] for row in dataset["listens"]}),
+            "train_fraction": args.train_fraction,
+        },
+        "k": args.k,
+        "configs": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+        print(f"Wrote {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Export the song catalog from Postgres as NDJSON or an Arrow IPC stream (same format as GET /api/admin/export).
+Reads through a server-side cursor, so memory stays bounded for any catalog size.
+
+Usage:
+    python scripts/export_catalog.py > catalog.ndjson
+    python scripts/export_catalog.py --genre rock --embeddings --out rock.ndjson
+    python scripts/export_catalog.py --format arrow --out catalog.arrows     # needs pyarrow
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any
+
+_scripts_dir = Path(__file__).resolve().parent
+if str(_scripts_dir) not in sys.path:
+    sys.path.insert(0, str(_scripts_dir))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+load_dotenv(dotenv_path=_scripts_dir / ".env")
+load_dotenv(dotenv_path=_scripts_dir.parent / ".env")
+load_dotenv(dotenv_path=_scripts_dir.parent / "backend" / ".env")
+
+import catalog_export
+from catalog_export import EXPORT_FORMATS, export_chunks
+from db import close_db_pool, get_db_pool, iter_songs
+
+
+async def run(args: argparse.Namespace) -> int:
+    if not await get_db_pool():
+        raise SystemExit("ERROR: Failed to connect to database. Check DATABASE_URL in .env")
+    embeddings = None
+    executor = None
+    if args.embeddings:
+        from vector_executor import AsyncVectorStore, VectorOpsExecutor
+        from vector_store import MusicVectorStore
+
+        executor = VectorOpsExecutor()
+        embeddings = AsyncVectorStore(MusicVectorStore(), executor).get_embeddings_for_songs
+    out: Any = open(args.out, "wb") if args.out else sys.stdout.buffer
+    written = 0
+    try:
+        async for chunk in export_chunks(iter_songs(genre=args.genre, batch_size=args.batch_size), args.format, embeddings):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.out:
+            out.close()
+        else:
+            out.flush()
+        if executor is not None:
+            executor.shutdown()
+        await close_db_pool()
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream the song catalog as NDJSON or Arrow IPC.")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--genre", help="only this genre (default: all)")
+    parser.add_argument("--embeddings", action="store_true", help="include each song's vector from the Chroma store")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per cursor fetch / output chunk")
+    parser.add_argument("--out", help="write here instead of stdout")
+    args = parser.parse_args()
+    if args.format == "arrow" and catalog_export.pa is None:
+        parser.error("--format arrow needs pyarrow (pip install pyarrow)")
+    if args.genre:
+        args.genre = args.genre.strip().lower()
+
+    written = asyncio.run(run(args))
+    if args.out:
+        print(f"Wrote {written} bytes to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+In-memory stand-in for the db.py interface, for load tests and local runs without Postgres.
+Same call signatures and row shapes (dicts with created_at / hot_score / play_count, same orderings and
+keyset semantics as the SQL); listens update play counts and hot scores exactly like the real writes.
+An optional per-call delay mimics a database round trip.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator
+from uuid import UUID, uuid4
+
+import db as db_module
+from db import _played_at, hot_stamp
+
+# Names in main.py that are bound to db.py functions at import time (main alias -> FakeDatabase method)
+MAIN_ALIASES = {
+    "get_db_pool": "get_db_pool",
+    "close_db_pool": "close_db_pool",
+    "db_get_songs": "get_songs",
+    "db_get_trending_songs": "get_trending_songs",
+    "db_get_song_by_id": "get_song_by_id",
+    "db_get_songs_by_ids": "get_songs_by_ids",
+    "db_log_listen": "log_listen",
+    "db_log_listens_batch": "log_listens_batch",
+    "db_iter_songs": "iter_songs",
+    "db_get_listen_history": "get_listen_history",
+    "db_get_listens_since": "get_listens_since",
+    "get_song_count": "get_song_count",
+    "db_search_songs": "search_songs",
+    "db_recompute_hot_scores": "recompute_hot_scores",
+}
+
+# db.py functions only reached through the db module (e.g. by discover.py)
+DB_ONLY = ("get_discover_songs", "get_least_played_ids")
+
+# Reads that db.py coalesces through db_flights; the fake's go through the same group
+_COALESCED = ("get_song_by_id", "get_songs_by_ids", "get_songs", "get_listen_history", "get_song_count")
+
+_CATALOG_COLUMNS = ("id", "deezer_id", "title", "artist", "album", "genre", "cover_url", "preview_url", "duration")
+
+
+def _log_add(a: float, b: float) -> float:
+    return max(a, b) + math.log1p(math.exp(-min(abs(a - b), 700.0)))
+
+
+class FakeDatabase:
+    """
+    Songs from a catalog of song dicts (e.g. synthetic_data.generate_catalog; "embedding" keys are ignored).
+    latency_ms is awaited on every call, like one round trip to Postgres.
+    """
+
+    def __init__(self, catalog: list[dict[str, Any]], latency_ms: float = 0.0, seed: int = 42) -> None:
+        self.latency = max(0.0, latency_ms) / 1000.0
+        self._rng = random.Random(seed)
+        now = datetime.utcnow().replace(microsecond=0)
+        self._songs: dict[str, dict[str, Any]] = {}
+        for i, song in enumerate(catalog):
+            row = {col: song.get(col) for col in _CATALOG_COLUMNS}
+            row["id"] = str(song["id"])
+            row.update(
+                play_count=int(song.get("play_count") or 0),
+                hot_score=float(song.get("hot_score") or 0.0),
+                last_played_at=None,
+                created_at=song.get("created_at") or now - timedelta(minutes=i),
+                updated_at=now,
+            )
+            self._songs[row["id"]] = row
+        self._listens: list[dict[str, Any]] = []
+        self._sorted: dict[str, list[dict[str, Any]]] = {}
+        self.calls = 0
+        for name in _COALESCED:
+            setattr(self, name, db_module.db_flights.wrap(getattr(self, name)))
+
+    def install(self, main_module: Any = None) -> None:
+        """Replace the db.py functions (and main.py's imported aliases, if given) with this fake's."""
+        for name in set(MAIN_ALIASES.values()) | set(DB_ONLY):
+            setattr(db_module, name, getattr(self, name))
+        if main_module is not None:
+            for alias, name in MAIN_ALIASES.items():
+                setattr(main_module, alias, getattr(self, name))
+
+    async def _round_trip(self) -> None:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _ordered(self, type: str | None) -> list[dict[str, Any]]:
+        key = "trending" if type == "trending" else "latest"
+        rows = self._sorted.get(key)
+        if rows is None:
+            column = "hot_score" if key == "trending" else "created_at"
+            rows = sorted(self._songs.values(), key=lambda r: (r[column], r["id"]), reverse=True)
+            self._sorted[key] = rows
+        return rows
+
+    async def get_db_pool(self) -> "FakeDatabase":
+        return self
+
+    async def close_db_pool(self) -> None:
+        return None
+
+    async def get_song_by_id(self, song_id: str) -> dict[str, Any] | None:
+        await self._round_trip()
+        row = self._songs.get(str(song_id))
+        return dict(row) if row else None
+
+    async def get_songs_by_ids(self, song_ids: list[str]) -> list[dict[str, Any]]:
+        await self._round_trip()
+        seen: set[str] = set()
+        out: list[dict[str, Any]] = []
+        for raw in song_ids:
+            key = str(raw)
+            row = self._songs.get(key)
+            if row is not None and key not in seen:
+                seen.add(key)
+                out.append({col: row[col] for col in _CATALOG_COLUMNS})
+        return out
+
+    async def get_songs(
+        self,
+        genre: str | None = None,
+        type: str | None = None,
+        limit: int = 50,
+        offset: int = 0,
+        records: bool = False,
+        after: tuple[Any, str] | None = None,
+    ) -> list[Any]:
+        await self._round_trip()
+        genre = genre.lower() if genre and genre.lower() != "all" else None
+        if type == "discover":
+            rows = [r for r in self._songs.values() if genre is None or r["genre"] == genre]
+            self._rng.shuffle(rows)
+            rows.sort(key=lambda r: r["play_count"])
+            return [dict(r) for r in rows[offset:offset + limit]]
+        rows = self._ordered(type)
+        if genre is not None:
+            rows = [r for r in rows if r["genre"] == genre]
+        if after is not None:
+            column = "hot_score" if type == "trending" else "created_at"
+            position = (after[0], str(after[1]))
+            rows = [r for r in rows if (r[column], r["id"]) < position]
+            offset = 0
+        return [dict(r) for r in rows[offset:offset + limit]]
+
+    async def iter_songs(self, genre: str | None = None, batch_size: int = 1000) -> AsyncIterator[list[Any]]:
+        rows = sorted(self._songs.values(), key=lambda r: r["id"])
+        if genre and genre.lower() != "all":
+            rows = [r for r in rows if r["genre"] == genre.lower()]
+        for i in range(0, len(rows), batch_size):
+            await self._round_trip()
+            yield [dict(r) for r in rows[i:i + batch_size]]
+
+    async def get_trending_songs(self, genre: str | None = None, limit: int = 20, records: bool = False) -> list[Any]:
+        return await self.get_songs(genre=genre, type="trending", limit=limit, records=records)
+
+    async def get_discover_songs(self, genre: str | None = None, limit: int = 20, records: bool = False) -> list[Any]:
+        return await self.get_songs(genre=genre, type="discover", limit=limit, records=records)
+
+    async def get_least_played_ids(self, genre: str | None = None, limit: int = 500) -> list[str]:
+        await self._round_trip()
+        rows = [r for r in self._songs.values() if not genre or genre.lower() == "all" or r["genre"] == genre.lower()]
+        self._rng.shuffle(rows)
+        rows.sort(key=lambda r: r["play_count"])
+        return [r["id"] for r in rows[:limit]]
+
+    def _apply_listen(self, song_id: str, user_id: str | None, ts: float) -> bool:
+        row = self._songs.get(song_id)
+        if row is None:
+            return False
+        played_at = _played_at(ts)
+        row["play_count"] += 1
+        row["last_played_at"] = max(row["last_played_at"] or played_at, played_at)
+        row["hot_score"] = _log_add(row["hot_score"], hot_stamp(ts))
+        self._listens.append({"id": str(uuid4()), "user_id": user_id, "song_id": song_id, "played_at": played_at})
+        self._sorted.pop("trending", None)
+        return True
+
+    async def log_listen(self, song_id: str, user_id: str | None = None, ts: float | None = None) -> bool:
+        await self._round_trip()
+        return self._apply_listen(str(song_id), user_id, time.time() if ts is None else ts)
+
+    async def log_listens_batch(self, events: list[tuple[str, str | None, float]]) -> int | None:
+        await self._round_trip()
+        return sum(1 for song_id, user_id, ts in events if self._apply_listen(str(song_id), user_id, ts))
+
+    async def recompute_hot_scores(self) -> int:
+        await self._round_trip()
+        return 0
+
+    async def get_listen_history(
+        self, user_id: str | None = None, limit: int = 10, read_your_writes: bool = False
+    ) -> list[dict[str, Any]]:
+        await self._round_trip()
+        if not user_id:
+            return []
+        out: list[dict[str, Any]] = []
+        seen: set[str] = set()
+        for listen in reversed(self._listens):
+            if listen["user_id"] == user_id and listen["song_id"] not in seen:
+                seen.add(listen["song_id"])
+                row = self._songs[listen["song_id"]]
+                out.append({**{col: row[col] for col in _CATALOG_COLUMNS}, "played_at": listen["played_at"]})
+                if len(out) >= limit:
+                    break
+        return out
+
+    async def get_listens_since(
+        self,
+        since: tuple[datetime, str] | None = None,
+        limit: int = 5000,
+        before: datetime | None = None,
+    ) -> list[dict[str, Any]]:
+        await self._round_trip()
+        if before is not None and before.tzinfo is not None:
+            before = before.replace(tzinfo=None) - (before.utcoffset() or timedelta(0))
+        rows = self._listens
+        if since is not None:
+            played_at, listen_id = since
+            if played_at.tzinfo is not None:
+                played_at = played_at.replace(tzinfo=None) - (played_at.utcoffset() or timedelta(0))
+            position = (played_at, UUID(str(listen_id or "00000000-0000-0000-0000-000000000000")))
+            rows = [r for r in rows if (r["played_at"], UUID(r["id"])) > position]
+        if before is not None:
+            rows = [r for r in rows if r["played_at"] < before]
+        rows = sorted(rows, key=lambda r: (r["played_at"], UUID(r["id"])))
+        return [dict(r) for r in rows[:limit]]
+
+    async def search_songs(self, q: str, genre: str | None = None, limit: int = 20) -> list[dict[str, Any]]:
+        """Case-insensitive prefix match of every query word against title/artist/album/genre words."""
+        await self._round_trip()
+        terms = [t for t in re.split(r"\W+", q.lower()) if t]
+        if not terms:
+            return []
+        scored = []
+        for row in self._songs.values():
+            if genre and genre.lower() != "all" and row["genre"] != genre.lower():
+                continue
+            text = " ".join(str(row[col] or "") for col in ("title", "artist", "album", "genre"))
+            words = re.split(r"\W+", text.lower())
+            if all(any(w.startswith(t) for w in words) for t in terms):
+                scored.append((1 + 0.1 * math.log1p(row["play_count"]), row))
+        scored.sort(key=lambda x: (-x[0], x[1]["id"]))
+        return [
+            {**{col: r[col] for col in _CATALOG_COLUMNS}, "play_count": r["play_count"], "score": score}
+            for score, r in scored[:limit]
+        ]
+
+    async def get_song_count(self, genre: str | None = None, estimate: bool = False) -> int:
+        await self._round_trip()
+        if genre and genre.lower() != "all":
+            return sum(1 for r in self._songs.values() if r["genre"] == genre.lower())
+        return len(self._songs)
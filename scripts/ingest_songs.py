@@ -8,7 +8,7 @@ import logging
 from typing import Any
 
 from deezer_client import fetch_all_genres, normalize_genre
-from db import upsert_song
+from db import upsert_songs_bulk
 
 log = logging.getLogger("ingest_songs")
 
@@ -46,34 +46,25 @@ async def ingest_genre(genre: str, songs_per_genre: int = SONGS_PER_GENRE) -> tu
     songs = fetch_tracks_by_genre(normalized_genre, limit=songs_per_genre)
     log.info("Fetched %d songs from Deezer for genre: %s", len(songs), normalized_genre)
     
-    inserted = 0
-    updated = 0
-    
-    # Upsert each song to Postgres
-    for song in songs:
-        deezer_id = song.get("deezer_id")
-        if not deezer_id:
-            continue
-        
-        # Check if this is a new insert or update
-        existing_id = await upsert_song(
-            deezer_id=deezer_id,
-            title=song.get("title", ""),
-            artist=song.get("artist", ""),
-            album=song.get("album"),
-            genre=normalized_genre,
-            cover_url=song.get("cover_url", ""),
-            preview_url=song.get("preview_url"),
-            duration=song.get("duration", 0),
-        )
-        
-        if existing_id:
-            # Check if it was newly created (would need a separate query, but for now assume update)
-            # In a production system, you'd track this better
-            updated += 1
-        else:
-            inserted += 1
+    # One bulk upsert for the whole genre instead of a SELECT + INSERT/UPDATE round trip per track
+    rows = [{**song, "genre": normalized_genre} for song in songs if song.get("deezer_id")]
+    results = await upsert_songs_bulk(rows)
+    failed = 0
+    if results is None:
+        # The batch is all-or-nothing: retry row by row so one bad track does not drop the whole genre
+        log.warning("Bulk upsert failed for genre %s, retrying %d songs one by one", normalized_genre, len(rows))
+        results = []
+        for row in rows:
+            row_result = await upsert_songs_bulk([row])
+            if row_result is None:
+                failed += 1
+            else:
+                results.extend(row_result)
+    inserted = sum(1 for _song_id, is_new in results if is_new)
+    updated = len(results) - inserted
     
+    if failed:
+        log.error("Ingestion for genre %s: %d songs failed to upsert", normalized_genre, failed)
     log.info("Ingestion complete for genre %s: %d inserted, %d updated", normalized_genre, inserted, updated)
     return inserted, updated
 
@@ -0,0 +1,154 @@
+"""
+Write-behind buffer for listen events.
+/api/listen enqueues (song_id, user_id, timestamp) and returns; a background task flushes every
+LISTEN_FLUSH_INTERVAL_MS or LISTEN_FLUSH_MAX_EVENTS events with one COPY into listens and one
+aggregated UPDATE of songs (see db.log_listens_batch), so a popular song's row is locked once per flush
+instead of once per play.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Optional
+from uuid import UUID
+
+log = logging.getLogger("listen_buffer")
+
+LISTEN_FLUSH_INTERVAL_MS = float(os.getenv("LISTEN_FLUSH_INTERVAL_MS", "200"))
+LISTEN_FLUSH_MAX_EVENTS = int(os.getenv("LISTEN_FLUSH_MAX_EVENTS", "500"))
+LISTEN_BUFFER_MAX_EVENTS = int(os.getenv("LISTEN_BUFFER_MAX_EVENTS", "10000"))
+# What enqueue does when the buffer is full: "block" (wait for the flusher), "drop" (reject the listen)
+# or "sync" (write this listen directly, the old one-transaction-per-play path)
+LISTEN_BUFFER_POLICY = os.getenv("LISTEN_BUFFER_POLICY", "block").strip().lower()
+LISTEN_BUFFER_POLICIES = ("block", "drop", "sync")
+
+# One listen: (song_id, user_id, unix time)
+ListenEvent = tuple[str, Optional[str], float]
+
+
+class ListenBuffer:
+    """
+    Bounded queue of listen events plus the task that drains it.
+    flush_batch(events) writes a batch and returns how many listens were stored (None on failure);
+    a failed batch is retried event by event through write_one(song_id, user_id, ts) so one bad row
+    (e.g. an unknown user) does not lose the rest. on_flush() runs after every successful flush.
+    """
+
+    def __init__(
+        self,
+        flush_batch: Callable[[list[ListenEvent]], Awaitable[int | None]],
+        write_one: Callable[[str, str | None, float], Awaitable[bool]],
+        on_flush: Callable[[], Any] | None = None,
+        *,
+        flush_interval_ms: float = LISTEN_FLUSH_INTERVAL_MS,
+        flush_max_events: int = LISTEN_FLUSH_MAX_EVENTS,
+        max_events: int = LISTEN_BUFFER_MAX_EVENTS,
+        policy: str = LISTEN_BUFFER_POLICY,
+    ) -> None:
+        if policy not in LISTEN_BUFFER_POLICIES:
+            log.warning("Unknown LISTEN_BUFFER_POLICY %r, using 'block'", policy)
+            policy = "block"
+        self._flush_batch = flush_batch
+        self._write_one = write_one
+        self._on_flush = on_flush
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.flush_max_events = max(1, flush_max_events)
+        self.policy = policy
+        self._queue: asyncio.Queue[ListenEvent] = asyncio.Queue(maxsize=max(1, max_events))
+        self._batch_ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self.enqueued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher (letting an in-flight flush finish) and write everything still buffered."""
+        if self._task is not None:
+            self._stopping = True
+            self._batch_ready.set()
+            await self._task
+            self._task = None
+        while not self._queue.empty():
+            await self.flush()
+
+    async def enqueue(self, song_id: str, user_id: str | None = None) -> bool:
+        """
+        Buffer one listen. Returns False if it was rejected: malformed ids (listens would refuse them),
+        or a full buffer under the "drop" policy.
+        """
+        try:
+            event: ListenEvent = (
+                str(UUID(str(song_id))),
+                str(UUID(str(user_id))) if user_id is not None else None,
+                time.time(),
+            )
+        except ValueError:
+            return False
+        if self._queue.full():
+            if self.policy == "drop":
+                self.dropped += 1
+                return False
+            if self.policy == "sync":
+                return await self._write_one(*event)
+        await self._queue.put(event)
+        self.enqueued += 1
+        if self._queue.qsize() >= self.flush_max_events:
+            self._batch_ready.set()
+        return True
+
+    async def flush(self) -> int:
+        """Write up to flush_max_events buffered listens now. Returns how many were stored."""
+        events: list[ListenEvent] = []
+        while len(events) < self.flush_max_events and not self._queue.empty():
+            events.append(self._queue.get_nowait())
+        if self._queue.qsize() < self.flush_max_events:
+            self._batch_ready.clear()
+        if not events:
+            return 0
+        stored = await self._flush_batch(events)
+        if stored is None:
+            log.warning("Batched listen flush of %d events failed; writing them one by one", len(events))
+            stored = 0
+            for event in events:
+                if await self._write_one(*event):
+                    stored += 1
+                else:
+                    self.failed += 1
+        else:
+            self.failed += len(events) - stored
+        self.flushed += stored
+        self.flushes += 1
+        if stored and self._on_flush is not None:
+            self._on_flush()
+        return stored
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping:
+                break
+            try:
+                await self.flush()
+            except Exception as e:
+                log.exception("Listen flush failed: %s", e)
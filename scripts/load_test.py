@@ -0,0 +1,585 @@
+"""
+HTTP load test for the AI service: closed-loop virtual users drive a weighted mix of /api/songs,
+/api/trending, /api/recommend and /api/listen and report throughput, latency percentiles and error
+rates per scenario as JSON.
+
+By default the FastAPI app runs in this process (requests go straight through its ASGI interface, no
+sockets) with an in-memory fake of db.py (fake_db.py) and a synthetic vector store seeded with --songs
+random embeddings, so no Postgres, Chroma or Gemini is needed. --db postgres keeps the real db.py on
+DATABASE_URL (still with synthetic vectors); --url drives an already running server over HTTP instead.
+
+The app does not resolve a user from requests yet (listens are anonymous), so /api/recommend never has a
+listen history and the "recommend" scenario measures its trending fallback, not the vector path; the
+report says so under that scenario's "path".
+
+Usage:
+    python scripts/load_test.py --out load.json                              # in-process, fake db
+    python scripts/load_test.py --songs 20000 --concurrency 64 --duration 60 --db-latency-ms 2
+    python scripts/load_test.py --db postgres --mix songs=50,listen=50
+    python scripts/load_test.py --url http://localhost:8000 --duration 120 --out staging.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import logging
+import os
+import random
+import ssl
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import urlencode, urlsplit
+
+_scripts_dir = Path(__file__).resolve().parent
+if str(_scripts_dir) not in sys.path:
+    sys.path.insert(0, str(_scripts_dir))
+
+from evaluate_recommender import _git_commit, _percentile
+from synthetic_data import SYNTHETIC_GENRES, generate_catalog
+
+DEFAULT_MIX = {"songs": 40, "trending": 25, "recommend": 15, "listen": 20}
+GENRE_CHOICES = [None, None] + SYNTHETIC_GENRES  # a third of the requests are unfiltered
+
+
+# --- transports -------------------------------------------------------------------------------------
+
+
+class AsgiTransport:
+    """Calls an ASGI app directly, one request at a time per call (shared by all virtual users)."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def request(self, method: str, path: str, body: bytes | None = None) -> tuple[int, bytes]:
+        path, _, query = path.partition("?")
+        headers = [(b"host", b"loadtest")]
+        if body is not None:
+            headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": query.encode(),
+            "headers": headers,
+            "client": ("127.0.0.1", 0),
+            "server": ("loadtest", 80),
+        }
+        done = asyncio.Event()
+        body_sent = False
+        status = 0
+        chunks: list[bytes] = []
+
+        async def receive() -> dict[str, Any]:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body or b"", "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    done.set()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            done.set()
+        return status, b"".join(chunks)
+
+    async def close(self) -> None:
+        return None
+
+
+class HttpTransport:
+    """Minimal HTTP/1.1 keep-alive client on asyncio streams (one connection per virtual user)."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0) -> None:
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported URL scheme: {parts.scheme!r}")
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.prefix = parts.path.rstrip("/")
+        self.host_header = parts.netloc
+        self.timeout = timeout
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def request(self, method: str, path: str, body: bytes | None = None) -> tuple[int, bytes]:
+        try:
+            return await asyncio.wait_for(self._request(method, path, body), self.timeout)
+        except BaseException:
+            await self.close()
+            raise
+
+    async def _request(self, method: str, path: str, body: bytes | None) -> tuple[int, bytes]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        reader, writer = self._reader, self._writer
+        head = f"{method} {self.prefix}{path} HTTP/1.1\r\nHost: {self.host_header}\r\nConnection: keep-alive\r\n"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        writer.write(head.encode("latin-1") + b"\r\n" + (body or b""))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split()[1])
+        headers: dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if "content-length" in headers:
+            payload = await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            parts: list[bytes] = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                parts.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            payload = b"".join(parts)
+        else:
+            payload = await reader.read()
+            headers["connection"] = "close"
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, payload
+
+    async def close(self) -> None:
+        writer, self._writer, self._reader = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+
+# --- scenarios --------------------------------------------------------------------------------------
+
+
+@dataclass
+class Catalog:
+    """Song ids the scenarios pick from, with Zipf-like play popularity (low indexes are played most)."""
+
+    ids: list[str]
+    cum_weights: list[float] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if not self.cum_weights:
+            self.cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(self.ids))))
+
+    def pick(self, rng: random.Random) -> str:
+        return rng.choices(self.ids, cum_weights=self.cum_weights)[0]
+
+
+@dataclass
+class UserState:
+    """Per virtual user: its RNG and the next_cursor of the last /api/songs page it read."""
+
+    rng: random.Random
+    cursor: str | None = None
+    cursor_genre: str | None = None
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    body: bytes | None = None
+    check: Callable[[int, bytes], str | None] | None = None
+    on_response: Callable[[bytes], None] | None = None
+
+
+def _query(path: str, **params: Any) -> str:
+    params = {k: v for k, v in params.items() if v is not None}
+    return f"{path}?{urlencode(params)}" if params else path
+
+
+def _ok_status(status: int, _body: bytes) -> str | None:
+    return None if 200 <= status < 400 else f"http_{status}"
+
+
+def _songs_request(state: UserState, catalog: Catalog) -> Request:
+    rng = state.rng
+    if state.cursor and rng.random() < 0.5:
+        # Keep paging the list this user is already scrolling
+        path = _query("/api/songs", genre=state.cursor_genre, limit=50, cursor=state.cursor)
+    else:
+        state.cursor_genre = rng.choice(GENRE_CHOICES)
+        path = _query("/api/songs", genre=state.cursor_genre, limit=50)
+
+    def remember_cursor(body: bytes) -> None:
+        try:
+            state.cursor = json.loads(body).get("next_cursor")
+        except ValueError:
+            state.cursor = None
+
+    return Request("GET", path, on_response=remember_cursor)
+
+
+def _trending_request(state: UserState, catalog: Catalog) -> Request:
+    return Request("GET", _query("/api/trending", genre=state.rng.choice(GENRE_CHOICES)))
+
+
+def _recommend_request(state: UserState, catalog: Catalog) -> Request:
+    return Request("GET", _query("/api/recommend", genre=state.rng.choice(GENRE_CHOICES)))
+
+
+def _listen_check(status: int, body: bytes) -> str | None:
+    if not 200 <= status < 300:
+        return f"http_{status}"
+    # The endpoint answers 200 with {"status": "error"} when the write failed
+    return None if b'"status":"ok"' in body.replace(b" ", b"") else "listen_failed"
+
+
+def _listen_request(state: UserState, catalog: Catalog) -> Request:
+    body = json.dumps({"song_id": catalog.pick(state.rng)}).encode()
+    return Request("POST", "/api/listen", body, check=_listen_check)
+
+
+SCENARIOS: dict[str, Callable[[UserState, Catalog], Request]] = {
+    "songs": _songs_request,
+    "trending": _trending_request,
+    "recommend": _recommend_request,
+    "listen": _listen_request,
+}
+
+# Code path a scenario actually exercises, where it differs from what the endpoint name suggests
+SCENARIO_PATHS = {
+    "recommend": "trending_fallback (requests carry no user, so there is no listen history)",
+}
+
+
+# --- measurement ------------------------------------------------------------------------------------
+
+
+@dataclass
+class ScenarioStats:
+    latencies_ms: list[float] = field(default_factory=list)
+    statuses: Counter[str] = field(default_factory=Counter)
+    errors: Counter[str] = field(default_factory=Counter)
+    degraded: int = 0
+
+    def summary(self, seconds: float) -> dict[str, Any]:
+        latencies = sorted(self.latencies_ms)
+        n = len(latencies)
+        failed = sum(self.errors.values())
+        out: dict[str, Any] = {
+            "requests": n,
+            "throughput_rps": round(n / seconds, 2) if seconds else 0.0,
+            "errors": failed,
+            "error_rate": round(failed / n, 4) if n else 0.0,
+            "error_kinds": dict(self.errors),
+            "status_codes": dict(self.statuses),
+            "latency_ms": {
+                "p50": round(_percentile(latencies, 50), 3),
+                "p90": round(_percentile(latencies, 90), 3),
+                "p95": round(_percentile(latencies, 95), 3),
+                "p99": round(_percentile(latencies, 99), 3),
+                "max": round(latencies[-1], 3) if latencies else 0.0,
+                "mean": round(sum(latencies) / n, 3) if n else 0.0,
+            },
+        }
+        if self.degraded:
+            out["degraded"] = self.degraded
+        return out
+
+    def merge(self, other: "ScenarioStats") -> None:
+        self.latencies_ms.extend(other.latencies_ms)
+        self.statuses.update(other.statuses)
+        self.errors.update(other.errors)
+        self.degraded += other.degraded
+
+
+async def _virtual_user(
+    transport_factory: Callable[[], Any],
+    mix: dict[str, int],
+    catalog: Catalog,
+    seed: int,
+    record_from: float,
+    stop_at: float,
+    think_ms: float,
+    stats: dict[str, ScenarioStats],
+) -> None:
+    state = UserState(rng=random.Random(seed))
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    transport = transport_factory()
+    try:
+        while time.perf_counter() < stop_at:
+            name = state.rng.choices(names, weights=weights)[0]
+            req = SCENARIOS[name](state, catalog)
+            start = time.perf_counter()
+            error: str | None
+            status = 0
+            body = b""
+            try:
+                status, body = await transport.request(req.method, req.path, req.body)
+                error = (req.check or _ok_status)(status, body)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = type(e).__name__
+            elapsed = time.perf_counter() - start
+            if start >= record_from:
+                s = stats[name]
+                s.latencies_ms.append(elapsed * 1000.0)
+                s.statuses[str(status) if status else "none"] += 1
+                if error:
+                    s.errors[error] += 1
+                elif b'"degraded":true' in body:
+                    s.degraded += 1
+            if not error and req.on_response is not None:
+                req.on_response(body)
+            if think_ms > 0:
+                await asyncio.sleep(state.rng.expovariate(1000.0 / think_ms))
+    finally:
+        await transport.close()
+
+
+async def run_load(
+    transport_factory: Callable[[], Any],
+    mix: dict[str, int],
+    song_ids: list[str],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    think_ms: float,
+    seed: int,
+) -> dict[str, Any]:
+    stats = {name: ScenarioStats() for name in mix}
+    started = time.perf_counter()
+    record_from = started + warmup
+    stop_at = record_from + duration
+    catalog = Catalog(song_ids)
+    users = [
+        asyncio.create_task(
+            _virtual_user(transport_factory, mix, catalog, seed + i, record_from, stop_at, think_ms, stats)
+        )
+        for i in range(concurrency)
+    ]
+    await asyncio.gather(*users)
+    measured = max(1e-9, time.perf_counter() - record_from)
+    total = ScenarioStats()
+    for s in stats.values():
+        total.merge(s)
+    return {
+        "measured_seconds": round(measured, 3),
+        "total": total.summary(measured),
+        "scenarios": {
+            name: {**s.summary(measured), **({"path": SCENARIO_PATHS[name]} if name in SCENARIO_PATHS else {})}
+            for name, s in stats.items()
+        },
+    }
+
+
+# --- targets ----------------------------------------------------------------------------------------
+
+
+async def _fetch_song_ids(transport: Any, limit: int = 500) -> list[str]:
+    status, body = await transport.request("GET", _query("/api/songs", limit=limit, compact="true"))
+    if status != 200:
+        raise SystemExit(f"ERROR: GET /api/songs returned {status}; is the service up?")
+    ids = [str(song["id"]) for song in json.loads(body).get("songs", []) if song.get("id")]
+    if not ids:
+        raise SystemExit("ERROR: the catalog is empty; seed songs first (python scripts/seed_songs.py)")
+    return ids
+
+
+async def _run_remote(args: argparse.Namespace, mix: dict[str, int]) -> dict[str, Any]:
+    probe = HttpTransport(args.url)
+    try:
+        song_ids = await _fetch_song_ids(probe)
+    finally:
+        await probe.close()
+    result = await run_load(
+        lambda: HttpTransport(args.url), mix, song_ids, args.concurrency, args.duration, args.warmup, args.think_ms, args.seed
+    )
+    return {"target": {"mode": "http", "url": args.url}, **result}
+
+
+def _synthetic_store(catalog: list[dict[str, Any]]) -> tuple[Any, dict[str, list[float]]]:
+    import numpy as np
+
+    from synthetic_data import SyntheticVectorStore
+
+    by_genre: dict[str, list[list[float]]] = {}
+    for song in catalog:
+        by_genre.setdefault(song["genre"], []).append(song["embedding"])
+    genre_vectors = {genre: np.mean(vectors, axis=0).tolist() for genre, vectors in by_genre.items()}
+    return SyntheticVectorStore(catalog), genre_vectors
+
+
+async def _run_in_process(args: argparse.Namespace, mix: dict[str, int]) -> dict[str, Any]:
+    import colisten
+
+    with contextlib.ExitStack() as stack:
+        # The app prints to stdout from import on (banner, seeding); stdout is kept for the JSON report
+        app_out = sys.stderr if args.verbose else stack.enter_context(open(os.devnull, "w"))
+        stack.enter_context(contextlib.redirect_stdout(app_out))
+        # Keep the app's co-listen snapshot out of the working tree; save()/load() read the path at call time
+        snapshot_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="loadtest-"))
+        stack.callback(setattr, colisten, "COLISTEN_PATH", colisten.COLISTEN_PATH)
+        colisten.COLISTEN_PATH = str(Path(snapshot_dir) / "colisten_model.npz")
+        return await _run_app(args, mix)
+
+
+async def _run_app(args: argparse.Namespace, mix: dict[str, int]) -> dict[str, Any]:
+    import main
+    from recommendation_engine import HISTORY_SIZE, Recommender
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    catalog = generate_catalog(n_songs=args.songs, seed=args.seed)
+    fake = None
+    if args.db == "fake":
+        from fake_db import FakeDatabase
+
+        fake = FakeDatabase(catalog, latency_ms=args.db_latency_ms, seed=args.seed)
+        fake.install(main)
+    else:
+        rows = await main.db_get_songs(limit=args.songs)
+        if not rows:
+            raise SystemExit("ERROR: no songs from DATABASE_URL; check the connection and seed songs first")
+        # Same synthetic embeddings, attached to the real catalog ids
+        catalog = [
+            {**dict(row), "id": str(row["id"]), "genre": row["genre"] or synthetic["genre"], "embedding": synthetic["embedding"]}
+            for row, synthetic in zip(rows, catalog)
+        ]
+
+    store, genre_vectors = _synthetic_store(catalog)
+
+    def init_synthetic(api_key_override: str | None = None, refetch: bool = True) -> None:
+        main._store = store
+        main._recommender = Recommender(store, genre_vectors=genre_vectors, history_size=HISTORY_SIZE, colisten=main._colisten)
+        main._init_error = None
+
+    main._do_init = init_synthetic
+    transport = AsgiTransport(main.app)
+    async with main.app.router.lifespan_context(main.app):
+        while not main._readiness.settled:
+            await asyncio.sleep(0.05)
+        song_ids = [str(song["id"]) for song in catalog]
+        result = await run_load(
+            lambda: transport, mix, song_ids, args.concurrency, args.duration, args.warmup, args.think_ms, args.seed
+        )
+        buffer = main._listen_buffer
+        listen_buffer = (
+            {"enqueued": buffer.enqueued, "flushed": buffer.flushed, "dropped": buffer.dropped, "failed": buffer.failed}
+            if buffer is not None
+            else None
+        )
+    target = {
+        "mode": "in-process",
+        "db": args.db,
+        "db_latency_ms": args.db_latency_ms if fake is not None else None,
+        "songs": len(catalog),
+    }
+    if fake is not None:
+        target["db_calls"] = fake.calls
+    if listen_buffer is not None:
+        target["listen_buffer"] = listen_buffer
+    return {"target": target, **result}
+
+
+def _parse_mix(text: str | None) -> dict[str, int]:
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix: dict[str, int] = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"unknown scenario {name!r} (choose from: {', '.join(SCENARIOS)})")
+        mix[name] = int(weight) if weight.strip() else 1
+    mix = {name: weight for name, weight in mix.items() if weight > 0}
+    if not mix:
+        raise ValueError("the mix needs at least one scenario with a positive weight")
+    return mix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the AI service and report latency/throughput/errors as JSON.")
+    parser.add_argument("--url", help="drive a running server over HTTP instead of the in-process app")
+    parser.add_argument("--db", choices=["fake", "postgres"], default="fake", help="in-process: database behind the app")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="fake db: simulated round trip per call")
+    parser.add_argument("--songs", type=int, default=5000, help="in-process: catalog size / synthetic embeddings")
+    parser.add_argument("--mix", help=f"scenario weights, e.g. songs=40,trending=25 (default: {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=32, help="virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds of unrecorded load first")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between a user's requests")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verbose", action="store_true", help="keep the in-process app's logs and prints")
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+    try:
+        mix = _parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.concurrency < 1 or args.duration <= 0:
+        parser.error("--concurrency must be >= 1 and --duration > 0")
+
+    if args.db == "postgres" and not args.url:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        load_dotenv(dotenv_path=_scripts_dir / ".env")
+        load_dotenv(dotenv_path=_scripts_dir.parent / ".env")
+        load_dotenv(dotenv_path=_scripts_dir.parent / "backend" / ".env")
+
+    print(f"Running {args.concurrency} users for {args.warmup:g}s warm-up + {args.duration:g}s...", file=sys.stderr)
+    runner = _run_remote if args.url else _run_in_process
+    result = asyncio.run(runner(args, mix))
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "think_ms": args.think_ms,
+            "mix": mix,
+            "seed": args.seed,
+        },
+        **result,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+        print(f"Wrote {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,38 +22,66 @@ load_dotenv(dotenv_path=_scripts_dir.parent / "backend" / ".env")
 
 import logging
 import asyncio
+import hmac
 import time
 from contextlib import asynccontextmanager
-from typing import Any
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable
 
 logging.basicConfig(level=logging.INFO, stream=sys.stdout, format="%(levelname)s [%(name)s] %(message)s")
 log = logging.getLogger("main")
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
 from data_ingestion import fetch_deezer_data, enrich_song_data
 from recommendation_engine import (
     Recommender,
     assign_primary_genre,
-    compute_genre_vectors,
+    blend_scores,
+    load_or_compute_genre_vectors,
     HISTORY_SIZE,
     RECOMMEND_K,
     TRENDING_SIZE,
 )
 from vector_store import MusicVectorStore
+from vector_executor import AsyncVectorStore, VectorOpsExecutor
+from colisten import CoListenModel
+from readiness import DEGRADED, FAILED, READY, Readiness
+from admission import AdmissionController
+from profiler import PROFILER
+from discover import DISCOVER
+import db as db_module
+import metrics
+from metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT, stage
+import serialization
+import singleflight
+import request_timing
+from request_timing import REQUEST_TIMING_LOG_SAMPLE_RATE, REQUEST_TIMING_SAMPLE_RATE
+from response_cache import ResponseCache, etag_matches, normalize_params
+from pagination import InvalidCursor, decode_cursor, encode_cursor, ordering_for
+import catalog_export
+from catalog_export import EXPORT_FORMATS, EXPORT_MEDIA_TYPES, export_chunks
+from serialization import encode_songs_payload, song_item
+from listen_buffer import LISTEN_FLUSH_INTERVAL_MS, ListenBuffer
 from db import (
     get_db_pool,
     close_db_pool,
     get_songs as db_get_songs,
     get_trending_songs as db_get_trending_songs,
-    get_discover_songs as db_get_discover_songs,
     get_song_by_id as db_get_song_by_id,
+    get_songs_by_ids as db_get_songs_by_ids,
     log_listen as db_log_listen,
+    log_listens_batch as db_log_listens_batch,
+    iter_songs as db_iter_songs,
     get_listen_history as db_get_listen_history,
+    get_listens_since as db_get_listens_since,
     get_song_count,
+    search_songs as db_search_songs,
+    recompute_hot_scores as db_recompute_hot_scores,
+    TRENDING_HALF_LIFE_HOURS,
 )
 from ingest_songs import ingest_all_genres, ingest_genre
 
@@ -66,11 +94,31 @@ print(f"SAFE_MODE SET TO: {SAFE_MODE}", flush=True)
 
 _store: MusicVectorStore | None = None
 _recommender: Recommender | None = None
+_colisten: CoListenModel | None = None
+_response_cache = ResponseCache()
+_vector_ops = VectorOpsExecutor()
+_listen_buffer: ListenBuffer | None = None
+_admission = AdmissionController()
+_readiness = Readiness(["database", "colisten", "vector_store", "recommender"])
 _initializing = False
 _init_error: str | None = None
 
+# Co-listen model refresh: poll for new listens every N seconds, at most BATCH rows per query
+COLISTEN_REFRESH_SECONDS = float(os.getenv("COLISTEN_REFRESH_SECONDS", "60"))
+COLISTEN_BATCH = int(os.getenv("COLISTEN_BATCH", "5000"))
+# Snapshot the model this often while it has unsaved listens, so a crash only loses the listens since then
+COLISTEN_SAVE_SECONDS = float(os.getenv("COLISTEN_SAVE_SECONDS", "600"))
+# Buffer listens and write them in batches (one COPY + one aggregated UPDATE per flush)
+LISTEN_BUFFER_ENABLED = os.getenv("LISTEN_BUFFER_ENABLED", "true").lower() in ("1", "true", "yes")
+# When set, /api/admin/* requires this value in the X-Admin-Token header
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
 
-def _do_init(api_key_override: str | None = None) -> None:
+
+def _do_init(api_key_override: str | None = None, refetch: bool = True) -> None:
+    """
+    Build the vector store and recommender. With refetch=False (startup warm-up) an already-populated
+    persisted store is reused as is, skipping the Deezer fetch and per-song enrichment calls.
+    """
     global _store, _recommender, _initializing, _init_error
     _initializing = True
     _init_error = None
@@ -81,14 +129,18 @@ def _do_init(api_key_override: str | None = None) -> None:
         _init_error = "GOOGLE_API_KEY is missing. Set it in .env or pass ?api_key=YOUR_KEY to GET /init."
         return
     try:
-        songs = fetch_deezer_data(limit=50)
-        if not songs:
-            log.warning("Deezer API returned 0 tracks – using seed songs.")
-            songs = _get_seed_songs()
+        store = MusicVectorStore()
+        if refetch or store.count() == 0:
+            songs = fetch_deezer_data(limit=50)
+            if not songs:
+                log.warning("Deezer API returned 0 tracks – using seed songs.")
+                songs = _get_seed_songs()
+            else:
+                enrich_song_data(songs)
+            store.add_songs(songs)
         else:
-            enrich_song_data(songs)
-        _store = MusicVectorStore()
-        _store.add_songs(songs)
+            log.info("Reusing persisted vector store (%d songs); skipping Deezer fetch.", store.count())
+        _store = store
         count = _store.count()
         print("Chroma collection count after init:", count)
         log.info("Init OK. Store has %d songs.", count)
@@ -105,8 +157,8 @@ def _do_init(api_key_override: str | None = None) -> None:
             _store.add_songs(retry_seed)
             print("Seeded", len(retry_seed), "songs. Count:", _store.count())
         print("FINAL COLLECTION COUNT:", _store.count(), flush=True)
-        genre_vectors = compute_genre_vectors(effective_key)
-        _recommender = Recommender(_store, genre_vectors=genre_vectors, history_size=HISTORY_SIZE)
+        genre_vectors = load_or_compute_genre_vectors(effective_key)
+        _recommender = Recommender(_store, genre_vectors=genre_vectors, history_size=HISTORY_SIZE, colisten=_colisten)
     except Exception as e:
         _init_error = str(e)
         _store = None
@@ -198,6 +250,20 @@ def get_store() -> MusicVectorStore | None:
     return _store
 
 
+def get_async_store() -> AsyncVectorStore | None:
+    """The vector store wrapped so every call runs on the vector-ops executor, off the event loop."""
+    return AsyncVectorStore(_store, _vector_ops) if _store is not None else None
+
+
+def _average_embedding(embeddings_list: list[list[float]]) -> list[float]:
+    try:
+        import numpy as np
+        return np.mean(embeddings_list, axis=0).tolist()
+    except ImportError:
+        log.warning("numpy not available, using first embedding")
+        return embeddings_list[0]
+
+
 def _lazy_seed(store: MusicVectorStore) -> None:
     """If Chroma is empty, add 2 test songs so endpoints can return data."""
     if store.count() > 0:
@@ -214,29 +280,146 @@ def get_recommender() -> Recommender | None:
     return _recommender
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    global _store, _recommender, _initializing, _init_error
-    # Initialize database connection pool
-    await get_db_pool()
+def get_colisten() -> CoListenModel | None:
+    return _colisten
+
+
+async def _refresh_colisten() -> int:
+    """Feed listens newer than the model watermark into the co-listen model. Returns rows consumed."""
+    model = get_colisten()
+    if model is None:
+        return 0
+    total = 0
+    # Listens are stamped when enqueued but committed at flush time; stay behind the buffer
+    settled = datetime.now(timezone.utc) - timedelta(seconds=5 + 2 * LISTEN_FLUSH_INTERVAL_MS / 1000.0)
+    while True:
+        rows = await db_get_listens_since(model.watermark, limit=COLISTEN_BATCH, before=settled)
+        if not rows:
+            break
+        # Off the event loop: scoring for /api/recommend reads the model from _vector_ops threads meanwhile
+        total += await _vector_ops.run(model.add_listens, rows)
+        if len(rows) < COLISTEN_BATCH:
+            break
+    if total:
+        log.info("Co-listen model: consumed %d new listens (%d songs)", total, len(model))
+    return total
+
+
+async def _colisten_refresh_loop() -> None:
+    loop = asyncio.get_running_loop()
+    unsaved = 0
+    saved_at = time.monotonic()
+    while True:
+        try:
+            unsaved += await _refresh_colisten()
+            model = get_colisten()
+            if model is not None and unsaved and time.monotonic() - saved_at >= COLISTEN_SAVE_SECONDS:
+                if await loop.run_in_executor(None, model.save):
+                    unsaved = 0
+                saved_at = time.monotonic()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning("Co-listen refresh failed: %s", e)
+        await asyncio.sleep(COLISTEN_REFRESH_SECONDS)
+
+
+async def _record_model_readiness() -> None:
+    """Set vector_store and recommender readiness from the outcome of the last _do_init."""
+    store = get_async_store()
+    if store is not None:
+        count = await store.count()
+        _readiness.set("vector_store", READY if store.embeddings_enabled else DEGRADED, f"{count} songs")
+    else:
+        _readiness.set("vector_store", FAILED, _init_error or "not initialized")
+    recommender = get_recommender()
+    if recommender is None:
+        _readiness.set("recommender", FAILED, _init_error or "not initialized")
+    elif not recommender.get_genre_vectors():
+        _readiness.set("recommender", DEGRADED, "no genre vectors")
+    else:
+        _readiness.set("recommender", READY)
+
+
+async def _warm_up() -> None:
+    """
+    Bring components up in the background, recording each in _readiness: database pool, co-listen snapshot,
+    vector store (persisted Chroma collection; Deezer is only fetched when it is empty) and recommender.
+    """
+    global _colisten
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
     
-    # Wait for init to finish before accepting requests (so store exists when home page loads)
-    loop = asyncio.get_event_loop()
-    await loop.run_in_executor(None, lambda: _do_init(api_key_override=None))
-    if _store is not None:
-        count = _store.count()
+    pool = await get_db_pool()
+    if pool is not None:
+        _readiness.set("database", READY)
+    else:
+        _readiness.set("database", FAILED, "no connection pool (check DATABASE_URL)")
+    
+    # Co-listen model: resume from the last snapshot, then catch up incrementally in the background
+    try:
+        _colisten = await loop.run_in_executor(None, CoListenModel.load)
+        _readiness.set("colisten", READY, f"{len(_colisten)} songs")
+    except Exception as e:
+        log.exception("Co-listen load failed: %s", e)
+        _readiness.set("colisten", FAILED, str(e))
+    
+    await loop.run_in_executor(None, lambda: _do_init(api_key_override=None, refetch=False))
+    store = get_async_store()
+    if store is not None:
+        count = await store.count()
         if count == 0:
             print("Collection empty at startup – seeding.", flush=True)
-            _lazy_seed(_store)
-            print("Songs inserted by lazy_seed. Count:", _store.count(), flush=True)
-        print("FINAL COLLECTION COUNT:", _store.count(), flush=True)
-        print("Startup complete. Chroma count:", _store.count())
+            await loop.run_in_executor(None, _lazy_seed, _store)
+            count = await store.count()
+        print("Warm-up complete. Chroma count:", count)
     elif _init_error:
-        print("Startup complete but init failed:", _init_error)
+        print("Warm-up complete but init failed:", _init_error)
+    await _record_model_readiness()
+    log.info("Warm-up finished in %.1fs", time.perf_counter() - started)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _store, _recommender, _colisten, _vector_ops, _listen_buffer, _readiness, _initializing, _init_error
+    _readiness = Readiness(["database", "colisten", "vector_store", "recommender"])
+    
+    if LISTEN_BUFFER_ENABLED:
+        _listen_buffer = ListenBuffer(
+            lambda events: db_log_listens_batch(events),
+            lambda song_id, user_id, ts: db_log_listen(song_id, user_id, ts=ts),
+            on_flush=_response_cache.mark_listen,
+        )
+        _listen_buffer.start()
+    
+    # Accept traffic right away; endpoints fall back to Postgres-only answers until warm-up finishes
+    warm_up_task = asyncio.create_task(_warm_up())
+    # Co-listen refresh starts consuming listens once warm-up has loaded the model
+    colisten_task = asyncio.create_task(_colisten_refresh_loop())
     yield
+    if not warm_up_task.done():
+        warm_up_task.cancel()
+        try:
+            await warm_up_task
+        except asyncio.CancelledError:
+            pass
+    if _listen_buffer is not None:
+        await _listen_buffer.stop()
+        _listen_buffer = None
+    colisten_task.cancel()
+    try:
+        await colisten_task
+    except asyncio.CancelledError:
+        pass
+    if _colisten is not None:
+        _colisten.save()
     await close_db_pool()
+    PROFILER.stop()
+    _vector_ops.shutdown()
+    _vector_ops = VectorOpsExecutor()
     _store = None
     _recommender = None
+    _colisten = None
     _initializing = False
     _init_error = None
 
@@ -276,35 +459,156 @@ app.add_middleware(
 
 
 @app.middleware("http")
-async def log_request_time(request, call_next):
-    """Log every request path and duration for performance debugging."""
+async def record_request_metrics(request, call_next):
+    """
+    Record request latency per route template, method and status (exported at /metrics), and for sampled
+    requests a per-stage breakdown as a Server-Timing header (plus an optional JSON log line).
+    """
     start = time.perf_counter()
-    response = await call_next(request)
-    duration = time.perf_counter() - start
-    print(f"[DEBUG] {request.url.path} took {duration:.2f}s")
-    return response
+    status = 500
+    timing, token = request_timing.start() if request_timing.sampled(REQUEST_TIMING_SAMPLE_RATE) else (None, None)
+    profile_token = PROFILER.begin(request.url.path)
+    REQUESTS_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        if timing is not None:
+            response.headers["Server-Timing"] = timing.server_timing()
+        return response
+    finally:
+        PROFILER.end(profile_token)
+        REQUESTS_IN_FLIGHT.dec()
+        elapsed = time.perf_counter() - start
+        route = getattr(request.scope.get("route"), "path", None) or "unmatched"
+        REQUEST_LATENCY.observe(elapsed, method=request.method, route=route, status=status)
+        if timing is not None:
+            request_timing.finish(token)
+            if request_timing.sampled(REQUEST_TIMING_LOG_SAMPLE_RATE):
+                request_timing.log.info(serialization.dumps({
+                    "method": request.method,
+                    "route": route,
+                    "status": status,
+                    "total_ms": round(elapsed * 1000, 3),
+                    "spans": timing.as_dict(),
+                }).decode("utf-8"))
+
+
+_POOL_GAUGE = metrics.REGISTRY.gauge("db_pool_connections", "asyncpg pool connections by kind (size, idle, in_use, min_size, max_size).", ("kind",))
+_POOL_UTILISATION = metrics.REGISTRY.gauge("db_pool_utilisation", "Connections in use as a fraction of the pool's max_size.")
+_READ_POOL_GAUGE = metrics.REGISTRY.gauge("db_read_pool_connections", "Read replica pool connections by kind (DATABASE_READ_URL).", ("kind",))
+_DISCOVER_POOL = metrics.REGISTRY.gauge("discover_pool_songs", "Song ids in the in-memory discover pool by genre.", ("genre",))
+_CACHE_HITS = metrics.REGISTRY.counter("cache_hits_total", "Cache hits by cache.", ("cache",))
+_CACHE_MISSES = metrics.REGISTRY.counter("cache_misses_total", "Cache misses by cache.", ("cache",))
+_CACHE_HIT_RATIO = metrics.REGISTRY.gauge("cache_hit_ratio", "Lifetime hit ratio by cache.", ("cache",))
+_CACHE_ENTRIES = metrics.REGISTRY.gauge("cache_entries", "Entries currently held by cache.", ("cache",))
+_VECTOR_STORE_SONGS = metrics.REGISTRY.gauge("vector_store_songs", "Songs in the vector store (sampled at scrape).")
+_VECTOR_OPS = metrics.REGISTRY.gauge("vector_ops", "Vector-ops executor calls by state (queued, running).", ("state",))
+_VECTOR_OPS_COMPLETED = metrics.REGISTRY.counter("vector_ops_completed_total", "Vector-ops executor calls completed.")
+_LISTEN_BUFFER = metrics.REGISTRY.gauge("listen_buffer_events", "Listen events waiting in the write-behind buffer.")
+_LISTENS = metrics.REGISTRY.counter("listen_buffer_listens_total", "Buffered listens by outcome (enqueued, flushed, dropped, failed).", ("outcome",))
+_FLIGHT_CALLS = metrics.REGISTRY.counter("singleflight_calls_total", "Calls through a single-flight group.", ("group",))
+_FLIGHT_COALESCED = metrics.REGISTRY.counter(
+    "singleflight_coalesced_total", "Calls that joined an identical in-flight call instead of running their own.", ("group",)
+)
+_FLIGHT_INFLIGHT = metrics.REGISTRY.gauge("singleflight_inflight", "Distinct calls currently in flight per group.", ("group",))
+_RECOMMEND_DEGRADED = metrics.REGISTRY.counter(
+    "recommend_degraded_total", "/api/recommend requests answered with trending because of load shedding.", ("reason",)
+)
+_ADMISSION = metrics.REGISTRY.gauge(
+    "recommend_admission", "Admission controller state: in_flight vector recommendations and latency_ewma_ms.", ("kind",)
+)
+_COMPONENT_READY = metrics.REGISTRY.gauge("component_ready", "1 if the component is ready or degraded, else 0.", ("component",))
+
+
+def _collect_metrics() -> None:
+    pool = db_module.pool_stats()
+    for kind, value in pool.items():
+        _POOL_GAUGE.set(value, kind=kind)
+    if pool.get("max_size"):
+        _POOL_UTILISATION.set(pool["in_use"] / pool["max_size"])
+    for kind, value in db_module.pool_stats(read=True).items():
+        _READ_POOL_GAUGE.set(value, kind=kind)
+    for genre, size in DISCOVER.pool_sizes().items():
+        _DISCOVER_POOL.set(size, genre=genre)
+    caches = {
+        "response": (_response_cache.hits, _response_cache.misses, len(_response_cache)),
+        "song_rows": (db_module.song_cache.hits, db_module.song_cache.misses, len(db_module.song_cache)),
+    }
+    for name, (hits, misses, entries) in caches.items():
+        _CACHE_HITS.set_total(hits, cache=name)
+        _CACHE_MISSES.set_total(misses, cache=name)
+        _CACHE_HIT_RATIO.set(hits / (hits + misses) if hits + misses else 0.0, cache=name)
+        _CACHE_ENTRIES.set(entries, cache=name)
+    _CACHE_ENTRIES.set(serialization.fragment_count(), cache="json_fragments")
+    _VECTOR_OPS.set(_vector_ops.queue_depth, state="queued")
+    _VECTOR_OPS.set(_vector_ops.running, state="running")
+    _VECTOR_OPS_COMPLETED.set_total(_vector_ops.completed)
+    buffer = _listen_buffer
+    if buffer is not None:
+        _LISTEN_BUFFER.set(len(buffer))
+        for outcome in ("enqueued", "flushed", "dropped", "failed"):
+            _LISTENS.set_total(getattr(buffer, outcome), outcome=outcome)
+    _ADMISSION.set(_admission.in_flight, kind="in_flight")
+    _ADMISSION.set(_admission.ewma_ms, kind="latency_ewma_ms")
+    for group in singleflight.groups():
+        _FLIGHT_CALLS.set_total(group.calls, group=group.name)
+        _FLIGHT_COALESCED.set_total(group.coalesced, group=group.name)
+        _FLIGHT_INFLIGHT.set(len(group), group=group.name)
+    for name, entry in _readiness.snapshot()["components"].items():
+        _COMPONENT_READY.set(1 if entry["state"] in (READY, DEGRADED) else 0, component=name)
+
+
+metrics.REGISTRY.add_collector(_collect_metrics)
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition of request, stage, pool, cache and vector store metrics."""
+    store = get_async_store()
+    if store is not None:
+        try:
+            _VECTOR_STORE_SONGS.set(await store.count())
+        except Exception as e:
+            log.warning("metrics: vector store count failed: %s", e)
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
 
 
 class ListenBody(BaseModel):
     song_id: str | int
 
 
+@app.get("/api/ready")
+async def ready():
+    """Readiness probe: 200 once required components are up, 503 while warming up or if they failed."""
+    if _readiness.state("database") == FAILED and await get_db_pool() is not None:
+        _readiness.set("database", READY)
+    snapshot = _readiness.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
 @app.get("/api/debug")
 async def debug():
-    store = get_store()
-    count = store.count() if store else 0
-    return {"initializing": _initializing, "init_error": _init_error, "store_count": count, "has_recommender": get_recommender() is not None}
+    store = get_async_store()
+    count = await store.count() if store else 0
+    coalesced = {group.name: {"calls": group.calls, "coalesced": group.coalesced} for group in singleflight.groups()}
+    return {
+        "initializing": _initializing,
+        "init_error": _init_error,
+        "store_count": count,
+        "has_recommender": get_recommender() is not None,
+        "singleflight": coalesced,
+    }
 
 
 @app.get("/api/debug-chroma")
 async def debug_chroma():
     """Return Chroma count and a sample of songs for diagnostics."""
-    store = get_store()
+    store = get_async_store()
     if store is None:
         return {"count": 0, "sample": [], "message": "Store not initialized"}
-    count = store.count()
+    count = await store.count()
     print("Chroma count:", count)
-    sample = store.get_all_songs()[:3]
+    sample = (await store.get_all_songs())[:3]
     return {"count": count, "sample": sample}
 
 
@@ -312,9 +616,11 @@ async def debug_chroma():
 async def init_pipeline(api_key: str | None = None):
     loop = asyncio.get_event_loop()
     await loop.run_in_executor(None, lambda: _do_init(api_key_override=api_key))
+    await _record_model_readiness()
     if _init_error:
         raise HTTPException(status_code=400 if "GOOGLE_API_KEY is missing" in _init_error else 500, detail=_init_error)
-    n = len(_store.get_all_songs()) if _store else 0
+    store = get_async_store()
+    n = await store.count() if store else 0
     return {"status": "ok", "message": f"Initialized with {n} songs."}
 
 
@@ -332,19 +638,27 @@ async def listen(body: ListenBody, request: Request):
             # For now, we'll support anonymous listens
             pass
         
-        # Log to Postgres
+        # Log to Postgres: buffered and written in batches, or directly when buffering is off
         song_id_str = str(body.song_id)
-        success = await db_log_listen(song_id_str, user_id)
+        buffer = _listen_buffer
+        if buffer is not None:
+            success = await buffer.enqueue(song_id_str, user_id)
+        else:
+            success = await db_log_listen(song_id_str, user_id)
         
         # Also update recommender if available (for in-memory history)
         recommender = get_recommender()
         if recommender:
             try:
-                recommender.log_listen(body.song_id)
+                await _vector_ops.run(recommender.log_listen, body.song_id)
             except Exception as e:
                 log.warning("Recommender log_listen failed: %s", e)
         
         if success:
+            # Play counts changed: trending/discover responses refresh after the staleness window
+            # (buffered listens mark the cache when their batch is flushed)
+            if buffer is None:
+                _response_cache.mark_listen()
             return {"status": "ok", "song_id": body.song_id}
         else:
             return {"status": "error", "song_id": body.song_id, "message": "Failed to log listen"}
@@ -353,35 +667,57 @@ async def listen(body: ListenBody, request: Request):
         return {"status": "error", "song_id": body.song_id, "message": str(e)}
 
 
+def _require_admin(request: Request) -> None:
+    """403 unless ADMIN_TOKEN is unset or matches the X-Admin-Token header."""
+    if ADMIN_TOKEN and not hmac.compare_digest(request.headers.get("x-admin-token", ""), ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
 def _to_recommendation_item(song: dict[str, Any]) -> dict[str, Any]:
     """
     Build a JSON-serializable dict for the API (ids and values as str/int/float only).
     Works with both old ChromaDB format and new Postgres format.
     """
-    raw_id = song.get("id")
-    id_val = str(raw_id) if raw_id is not None else ""
-    title = song.get("title") or song.get("name") or ""
-    artist = song.get("artist") or ""
-    album = song.get("album") or ""
-    genre = song.get("genre") or song.get("primary_genre") or ""
-    cover_url = song.get("cover_url") or song.get("image") or ""
-    preview_url = song.get("preview_url") or ""
-    duration = song.get("duration", 0)
-    
-    return {
-        "id": id_val,
-        "name": str(title),
-        "artist": str(artist),
-        "album": str(album),
-        "genre": str(genre),
-        "preview_url": str(preview_url),
-        "image": str(cover_url),
-        "coverUrl": str(cover_url),  # Frontend expects coverUrl
-        "primary_genre": str(genre),
-        "title": str(title),
-        "tags": str(song.get("tags") or ""),
-        "duration": int(duration) if duration else 0,
-    }
+    return song_item(song)
+
+
+def _etag_response(request: Request, body: bytes, etag: str, cache_status: str) -> Response:
+    """200 with body, or 304 when the client's If-None-Match already has this ETag."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Cache": cache_status}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def _cached_songs_response(
+    request: Request,
+    path: str,
+    params: dict[str, Any],
+    build: Callable[[], Awaitable[Any]],
+    *,
+    compact: bool = False,
+    listen_sensitive: bool = False,
+) -> Response:
+    """
+    Serve a {"songs": [...]} payload from the response cache, building and caching it on a miss.
+    build() returns song rows (dicts or asyncpg Records), or (rows, extra) to add top-level keys such as
+    next_cursor; rows are encoded straight to bytes. Empty song lists are not cached, since db.py
+    returns [] on errors too.
+    """
+    norm = normalize_params({**params, "compact": 1 if compact else None})
+    key = _response_cache.make_key(path, norm)
+    entry = _response_cache.get(key)
+    if entry is not None:
+        return _etag_response(request, entry.body, entry.etag, "HIT")
+    with stage("db_fetch"):
+        songs = await build()
+    songs, extra = songs if isinstance(songs, tuple) else (songs, {})
+    with stage("serialization"):
+        body = encode_songs_payload(songs, compact=compact, **extra)
+    if songs:
+        entry = _response_cache.put(key, path, norm, body, listen_sensitive=listen_sensitive)
+        return _etag_response(request, entry.body, entry.etag, "MISS")
+    return Response(content=body, media_type="application/json")
 
 
 def _get_fallback_or_songs(store: MusicVectorStore | None, recommender: Any, genre: str | None, *, use_fallback_if_empty: bool = True):
@@ -447,7 +783,7 @@ async def history(request: Request, limit: int = 10):
         result = [_to_recommendation_item(song) for song in history_songs]
         
         log.info("GET /history – returning %d songs for user %s", len(result), user_id)
-        print(f"[ENDPOINT /history] took {time.perf_counter() - start:.2f}s, returned {len(result)} songs")
+        log.debug(f"[ENDPOINT /history] took {time.perf_counter() - start:.2f}s, returned {len(result)} songs")
         return result
     except Exception as e:
         log.exception("/history failed: %s", e)
@@ -456,10 +792,10 @@ async def history(request: Request, limit: int = 10):
 
 
 @app.get("/api/trending")
-async def trending(request: Request, genre: str | None = None, limit: int = TRENDING_SIZE):
+async def trending(request: Request, genre: str | None = None, limit: int = TRENDING_SIZE, compact: bool = False):
     """
-    Get trending songs ordered by play_count DESC.
-    Optionally filtered by genre.
+    Get trending songs ordered by time-decayed hot score (TRENDING_HALF_LIFE_HOURS).
+    Optionally filtered by genre. compact=true drops the duplicate name/image/primary_genre fields.
     """
     if SAFE_MODE:
         print("SAFE MODE ACTIVE:", request.url.path, flush=True)
@@ -472,26 +808,135 @@ async def trending(request: Request, genre: str | None = None, limit: int = TREN
         if genre and str(genre).strip().lower() != "all":
             normalized_genre = str(genre).strip().lower()
         
-        # Get trending songs from Postgres
-        songs = await db_get_trending_songs(genre=normalized_genre, limit=limit)
+        async def build() -> list[Any]:
+            # Get trending songs from Postgres (encoded straight from the records)
+            songs = await db_get_trending_songs(genre=normalized_genre, limit=limit, records=True)
+            log.info("GET /trending – returning %d songs (genre=%s)", len(songs), normalized_genre or "all")
+            return songs
         
-        # Convert to API format
-        result = [_to_recommendation_item(song) for song in songs]
-        
-        log.info("GET /trending – returning %d songs (genre=%s)", len(result), normalized_genre or "all")
-        print(f"[ENDPOINT /trending] took {time.perf_counter() - start:.2f}s, returned {len(result)} songs")
-        return {"songs": result}
+        response = await _cached_songs_response(
+            request, "/api/trending", {"genre": normalized_genre, "limit": limit}, build,
+            compact=compact, listen_sensitive=True,
+        )
+        log.debug(f"[ENDPOINT /trending] took {time.perf_counter() - start:.2f}s ({response.headers.get('X-Cache', 'BYPASS')})")
+        return response
     except Exception as e:
         log.exception("/trending failed: %s", e)
         print(f"[ENDPOINT /trending] took {time.perf_counter() - start:.2f}s, error: {e}", flush=True)
         return {"songs": []}
 
 
+def _normalize_genre(genre: str | None) -> str | None:
+    if genre and str(genre).strip().lower() != "all":
+        return str(genre).strip().lower()
+    return None
+
+
+async def _trending_recommendations(genre: str | None, degraded: str | None = None) -> dict[str, Any]:
+    """Trending songs as a /recommend response; degraded names the load-shedding reason, if any."""
+    songs = await db_get_trending_songs(genre=_normalize_genre(genre), limit=RECOMMEND_K)
+    response: dict[str, Any] = {"songs": [_to_recommendation_item(song) for song in songs]}
+    if degraded:
+        response["degraded"] = True
+        response["degraded_reason"] = degraded
+    return response
+
+
+async def _recommend_from_history(
+    store: AsyncVectorStore, listen_history: list[dict[str, Any]], genre: str | None
+) -> list[dict[str, Any]] | None:
+    """Vector + co-listen recommendations for a listen history; None if none of its songs have embeddings."""
+    # Get embeddings for listened songs and compute average
+    listened_song_ids = {str(song.get("id")) for song in listen_history}
+    with stage("embedding"):
+        embeddings_by_id = await store.get_embeddings_for_songs([str(song.get("id")) for song in listen_history])
+    embeddings_list = [
+        embeddings_by_id[str(song.get("id"))] for song in listen_history if embeddings_by_id.get(str(song.get("id")))
+    ]
+    if not embeddings_list:
+        return None
+    
+    # Compute average embedding
+    with stage("embedding"):
+        avg_embedding = await _vector_ops.run(_average_embedding, embeddings_list)
+    
+    # Query vector store for similar songs and blend with co-listen neighbours of the history
+    with stage("vector_search"):
+        scored_docs = await store.similarity_search_by_vector_with_score(avg_embedding, k=RECOMMEND_K + len(listened_song_ids))
+    meta_by_id: dict[str, dict[str, Any]] = {}
+    vector_hits: list[tuple[str, float]] = []
+    for doc, distance in scored_docs:
+        meta = getattr(doc, "metadata", None) or {}
+        song_id = str(meta.get("id") or "")
+        if song_id:
+            meta_by_id.setdefault(song_id, meta)
+            vector_hits.append((song_id, distance))
+    colisten = get_colisten()
+    with stage("colisten"):
+        colisten_scores = (
+            await _vector_ops.run(
+                colisten.score_candidates, [str(song.get("id")) for song in listen_history], k=RECOMMEND_K + len(listened_song_ids)
+            )
+            if colisten is not None
+            else {}
+        )
+    ranked = blend_scores(vector_hits, colisten_scores)
+    
+    # Convert to song format and filter out listened songs
+    result: list[dict[str, Any]] = []
+    seen_ids = set(listened_song_ids)
+    
+    # Get full song data from Postgres for all candidates in one query (or none on a warm cache)
+    candidate_ids = [song_id for song_id, _score in ranked if song_id not in seen_ids]
+    with stage("hydration"):
+        songs_by_id = {str(song["id"]): song for song in await db_get_songs_by_ids(candidate_ids)}
+    
+    for song_id in candidate_ids:
+        if song_id not in seen_ids:
+            seen_ids.add(song_id)
+            song_data = songs_by_id.get(song_id)
+            meta = meta_by_id.get(song_id)
+            if song_data:
+                result.append(_to_recommendation_item(song_data))
+            elif meta:
+                # Fallback to metadata if Postgres lookup fails
+                result.append(_to_recommendation_item({
+                    "id": song_id,
+                    "title": meta.get("name") or "",
+                    "artist": meta.get("artist") or "",
+                    "album": meta.get("album") or "",
+                    "genre": meta.get("genre") or "",
+                    "cover_url": meta.get("image") or "",
+                    "preview_url": meta.get("preview_url") or "",
+                }))
+            if len(result) >= RECOMMEND_K:
+                break
+    
+    # Apply genre filter if specified
+    normalized_genre = _normalize_genre(genre)
+    if normalized_genre:
+        result = [s for s in result if (s.get("genre") or "").lower() == normalized_genre]
+    
+    # If not enough results, fill with trending
+    if len(result) < RECOMMEND_K:
+        trending = await db_get_trending_songs(genre=normalized_genre, limit=RECOMMEND_K - len(result))
+        trending_ids = {str(s.get("id")) for s in trending}
+        for song in trending:
+            song_id = str(song.get("id"))
+            if song_id not in seen_ids and song_id not in trending_ids:
+                result.append(_to_recommendation_item(song))
+                if len(result) >= RECOMMEND_K:
+                    break
+    return result[:RECOMMEND_K]
+
+
 @app.get("/api/recommend")
 async def recommend(request: Request, genre: str | None = None):
     """
     AI-based recommendations: get last N listens, compute average embedding, query vector DB for similar songs.
     Excludes already listened songs and optionally filters by genre.
+    Under overload (see admission.py) the vector path is skipped and trending songs are returned with
+    "degraded": true.
     """
     if SAFE_MODE:
         print("SAFE MODE ACTIVE:", request.url.path, flush=True)
@@ -506,121 +951,50 @@ async def recommend(request: Request, genre: str | None = None):
             pass
         
         recommender = get_recommender()
-        store = get_store()
+        store = get_async_store()
         
         if recommender is None or store is None:
             # Fallback to trending if no recommender
             log.warning("GET /recommend – not initialized, falling back to trending")
-            normalized_genre = None
-            if genre and str(genre).strip().lower() != "all":
-                normalized_genre = str(genre).strip().lower()
-            songs = await db_get_trending_songs(genre=normalized_genre, limit=RECOMMEND_K)
-            result = [_to_recommendation_item(song) for song in songs]
-            return {"songs": result}
+            return await _trending_recommendations(genre)
         
         # Get listen history from Postgres
         listen_history = []
         if user_id:
-            listen_history = await db_get_listen_history(user_id, limit=HISTORY_SIZE)
+            with stage("db_fetch"):
+                listen_history = await db_get_listen_history(user_id, limit=HISTORY_SIZE)
         
         # If no history, fallback to trending
         if not listen_history:
             log.info("GET /recommend – no history, falling back to trending")
-            normalized_genre = None
-            if genre and str(genre).strip().lower() != "all":
-                normalized_genre = str(genre).strip().lower()
-            songs = await db_get_trending_songs(genre=normalized_genre, limit=RECOMMEND_K)
-            result = [_to_recommendation_item(song) for song in songs]
-            return {"songs": result}
+            return await _trending_recommendations(genre)
         
-        # Get embeddings for listened songs and compute average
-        listened_song_ids = {str(song.get("id")) for song in listen_history}
-        embeddings_list = []
-        for song in listen_history:
-            song_id = str(song.get("id"))
-            emb = store.get_embedding_for_song(song_id)
-            if emb:
-                embeddings_list.append(emb)
+        # Shed load before the expensive part: too many vector recommendations running, or too slow lately
+        shed_reason = _admission.try_admit()
+        if shed_reason:
+            log.warning("GET /recommend – overloaded (%s), serving trending", shed_reason)
+            _RECOMMEND_DEGRADED.inc(reason=shed_reason)
+            return await _trending_recommendations(genre, degraded=shed_reason)
+        admitted_at = time.perf_counter()
+        try:
+            result = await _recommend_from_history(store, listen_history, genre)
+        finally:
+            _admission.release(time.perf_counter() - admitted_at)
         
-        if not embeddings_list:
+        if result is None:
             # No embeddings found, fallback to trending
             log.info("GET /recommend – no embeddings found, falling back to trending")
-            normalized_genre = None
-            if genre and str(genre).strip().lower() != "all":
-                normalized_genre = str(genre).strip().lower()
-            songs = await db_get_trending_songs(genre=normalized_genre, limit=RECOMMEND_K)
-            result = [_to_recommendation_item(song) for song in songs]
-            return {"songs": result}
-        
-        # Compute average embedding
-        try:
-            import numpy as np
-            avg_embedding = np.mean(embeddings_list, axis=0).tolist()
-        except ImportError:
-            log.warning("numpy not available, using first embedding")
-            avg_embedding = embeddings_list[0]
-        
-        # Query vector store for similar songs
-        similar_docs = store.similarity_search_by_vector(avg_embedding, k=RECOMMEND_K + len(listened_song_ids))
-        
-        # Convert to song format and filter out listened songs
-        result: list[dict[str, Any]] = []
-        seen_ids = set(listened_song_ids)
-        
-        for doc in similar_docs:
-            meta = getattr(doc, "metadata", None) or {}
-            song_id = str(meta.get("id") or "")
-            if song_id and song_id not in seen_ids:
-                seen_ids.add(song_id)
-                # Get full song data from Postgres
-                song_data = await db_get_song_by_id(song_id)
-                if song_data:
-                    result.append(_to_recommendation_item(song_data))
-                elif meta:
-                    # Fallback to metadata if Postgres lookup fails
-                    result.append(_to_recommendation_item({
-                        "id": song_id,
-                        "title": meta.get("name") or "",
-                        "artist": meta.get("artist") or "",
-                        "album": meta.get("album") or "",
-                        "genre": meta.get("genre") or "",
-                        "cover_url": meta.get("image") or "",
-                        "preview_url": meta.get("preview_url") or "",
-                    }))
-                if len(result) >= RECOMMEND_K:
-                    break
-        
-        # Apply genre filter if specified
-        normalized_genre = None
-        if genre and str(genre).strip().lower() != "all":
-            normalized_genre = str(genre).strip().lower()
-            result = [s for s in result if (s.get("genre") or "").lower() == normalized_genre]
-        
-        # If not enough results, fill with trending
-        if len(result) < RECOMMEND_K:
-            trending = await db_get_trending_songs(genre=normalized_genre, limit=RECOMMEND_K - len(result))
-            trending_ids = {str(s.get("id")) for s in trending}
-            for song in trending:
-                song_id = str(song.get("id"))
-                if song_id not in seen_ids and song_id not in trending_ids:
-                    result.append(_to_recommendation_item(song))
-                    if len(result) >= RECOMMEND_K:
-                        break
+            return await _trending_recommendations(genre)
         
-        log.info("GET /recommend – returning %d songs (genre=%s)", len(result), normalized_genre or "all")
-        print(f"[ENDPOINT /recommend] took {time.perf_counter() - start:.2f}s, returned {len(result)} songs")
-        return {"songs": result[:RECOMMEND_K]}
+        log.info("GET /recommend – returning %d songs (genre=%s)", len(result), _normalize_genre(genre) or "all")
+        log.debug(f"[ENDPOINT /recommend] took {time.perf_counter() - start:.2f}s, returned {len(result)} songs")
+        return {"songs": result}
     except Exception as e:
         log.exception("/recommend failed: %s", e)
         print(f"[ENDPOINT /recommend] took {time.perf_counter() - start:.2f}s, error: {e}", flush=True)
         # Fallback to trending on error
         try:
-            normalized_genre = None
-            if genre and str(genre).strip().lower() != "all":
-                normalized_genre = str(genre).strip().lower()
-            songs = await db_get_trending_songs(genre=normalized_genre, limit=RECOMMEND_K)
-            result = [_to_recommendation_item(song) for song in songs]
-            return {"songs": result}
+            return await _trending_recommendations(genre)
         except Exception:
             return {"songs": []}
 
@@ -637,15 +1011,30 @@ async def get_songs(
     type: str | None = None,
     limit: int = 50,
     offset: int = 0,
+    compact: bool = False,
+    cursor: str | None = None,
 ):
     """
     Get songs with optional genre filter and type ordering.
-    type: 'trending' (by play_count), 'discover' (random/least played), None (default: latest)
+    type: 'trending' (by hot score), 'discover' (random/least played), None (default: latest)
+    compact=true drops the duplicate name/image/primary_genre fields.
+    Latest and trending pages carry next_cursor (null on the last page); pass it back as cursor= to get
+    the following page in constant time. offset still works but scans every skipped row.
+    Discover samples the least-played pool and ignores offset (see /api/discover for session paging).
     """
     if SAFE_MODE:
         print("SAFE MODE ACTIVE:", request.url.path, flush=True)
         return {"songs": _get_mock_songs()}
     print("REQUEST HIT:", request.url.path, flush=True)
+    ordering = ordering_for(type)
+    after = None
+    if cursor:
+        if ordering is None:
+            raise HTTPException(status_code=400, detail=f"cursor is not supported for type={type}")
+        try:
+            after = decode_cursor(cursor, ordering)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
     start = time.perf_counter()
     try:
         # Normalize genre
@@ -653,26 +1042,60 @@ async def get_songs(
         if genre and str(genre).strip().lower() != "all":
             normalized_genre = str(genre).strip().lower()
         
-        # Get songs from Postgres
-        songs = await db_get_songs(
-            genre=normalized_genre,
-            type=type,
-            limit=limit,
-            offset=offset,
-        )
-        
-        # Convert to API format
-        result = [_to_recommendation_item(song) for song in songs]
+        async def build() -> Any:
+            if type == "discover":
+                return await DISCOVER.sample(normalized_genre, limit)
+            if limit <= 0:
+                return ([], {"next_cursor": None}) if ordering else []
+            # Get songs from Postgres (encoded straight from the records); one extra row tells if there is a next page
+            songs = await db_get_songs(
+                genre=normalized_genre,
+                type=type,
+                limit=limit + 1 if ordering else limit,
+                offset=offset,
+                records=True,
+                after=after,
+            )
+            log.info("GET /songs – returning %d songs (genre=%s, type=%s)", len(songs), normalized_genre or "all", type or "default")
+            if ordering is None:
+                return songs
+            next_cursor = None
+            if limit > 0 and len(songs) > limit:
+                songs = songs[:limit]
+                last = songs[-1]
+                sort_value = last["hot_score"] if ordering == "trending" else last["created_at"]
+                next_cursor = encode_cursor(ordering, sort_value, last["id"])
+            return songs, {"next_cursor": next_cursor}
         
-        log.info("GET /songs – returning %d songs (genre=%s, type=%s)", len(result), normalized_genre or "all", type or "default")
-        print(f"[ENDPOINT /songs] took {time.perf_counter() - start:.2f}s, returned {len(result)} songs")
-        return {"songs": result}
+        response = await _cached_songs_response(
+            request,
+            "/api/songs",
+            {"genre": normalized_genre, "type": type, "limit": limit, "offset": None if after else offset, "cursor": cursor},
+            build,
+            compact=compact,
+            listen_sensitive=type in ("trending", "discover"),
+        )
+        log.debug(f"[ENDPOINT /songs] took {time.perf_counter() - start:.2f}s ({response.headers.get('X-Cache', 'BYPASS')})")
+        return response
     except Exception as e:
         log.exception("/songs failed: %s", e)
         print(f"[ENDPOINT /songs] took {time.perf_counter() - start:.2f}s, error: {e}", flush=True)
         return {"songs": []}
 
 
+@app.get("/api/songs/count")
+async def song_count(genre: str | None = None, estimate: bool = False):
+    """
+    Number of songs, optionally in one genre, from the in-memory count cache.
+    estimate=true uses planner statistics (cheap to refresh, approximate), e.g. for UI badges.
+    """
+    normalized_genre = None
+    if genre and str(genre).strip().lower() != "all":
+        normalized_genre = str(genre).strip().lower()
+    count = await get_song_count(normalized_genre, estimate=estimate)
+    return {"genre": normalized_genre or "all", "count": count, "estimate": estimate}
+
+
 @app.get("/api/songs/{song_id}")
 async def get_song_by_id(song_id: str):
     """Get a single song by ID."""
@@ -689,13 +1112,14 @@ async def get_song_by_id(song_id: str):
 
 
 @app.post("/api/admin/deezer/refresh")
-async def refresh_deezer_data(genre: str | None = None):
+async def refresh_deezer_data(request: Request, genre: str | None = None):
     """
     Admin endpoint to trigger Deezer ingestion for a specific genre or all genres.
     Fetches songs from Deezer, upserts to Postgres, and triggers embedding.
     """
+    _require_admin(request)
     try:
-        store = get_store()
+        store = get_async_store()
         if not store:
             raise HTTPException(status_code=503, detail="Vector store not initialized")
         
@@ -707,37 +1131,168 @@ async def refresh_deezer_data(genre: str | None = None):
             results = await ingest_all_genres()
             total = sum(ins + upd for ins, upd in results.values())
         
-        # After ingestion, index new songs into vector store (batched)
-        # Get all songs from Postgres and index them in batches of 100
-        all_songs = await db_get_songs(limit=10000)  # Get all songs
-        if all_songs:
-            BATCH_SIZE = 100
-            total_indexed = 0
-            for i in range(0, len(all_songs), BATCH_SIZE):
-                batch = all_songs[i:i + BATCH_SIZE]
-                try:
-                    store.index_songs(batch)
-                    total_indexed += len(batch)
-                    log.info("Indexed batch %d: %d songs (total: %d/%d)", i//BATCH_SIZE + 1, len(batch), total_indexed, len(all_songs))
-                except Exception as e:
-                    log.warning("Failed to index batch %d: %s", i//BATCH_SIZE + 1, e)
-            log.info("Indexed %d songs into vector store", total_indexed)
+        # After ingestion, index songs into vector store (batched)
+        # Stream the catalog from Postgres and index it in batches of 100
+        BATCH_SIZE = 100
+        total_indexed = 0
+        batch_no = 0
+        async for rows in db_iter_songs(batch_size=BATCH_SIZE):
+            batch_no += 1
+            batch = [dict(row) for row in rows]
+            try:
+                await store.index_songs(batch)
+                total_indexed += len(batch)
+                log.info("Indexed batch %d: %d songs (total: %d)", batch_no, len(batch), total_indexed)
+            except Exception as e:
+                log.warning("Failed to index batch %d: %s", batch_no, e)
+        log.info("Indexed %d songs into vector store", total_indexed)
+        
+        # Catalog changed: drop every cached song list and discover pool
+        _response_cache.invalidate()
+        DISCOVER.clear()
         
         return {
             "status": "ok",
             "message": f"Ingested {total} songs",
             "genre": genre or "all",
-            "vector_store_count": store.count(),
+            "vector_store_count": await store.count(),
         }
     except Exception as e:
         log.exception("refresh_deezer_data failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/admin/export")
+async def export_catalog(
+    request: Request,
+    format: str = "ndjson",
+    genre: str | None = None,
+    embeddings: bool = False,
+    batch_size: int = 1000,
+):
+    """
+    Stream the whole catalog (optionally one genre) as NDJSON or an Arrow IPC stream, read from a
+    server-side cursor batch by batch. embeddings=true adds each song's vector from the vector store.
+    """
+    _require_admin(request)
+    fmt = format.strip().lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if fmt == "arrow" and catalog_export.pa is None:
+        raise HTTPException(status_code=501, detail="Arrow export needs pyarrow installed on the server")
+    if await get_db_pool() is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    store = get_async_store()
+    if embeddings and store is None:
+        raise HTTPException(status_code=503, detail="Vector store not initialized")
+    normalized_genre = str(genre).strip().lower() if genre else None
+    chunks = export_chunks(
+        db_iter_songs(genre=normalized_genre, batch_size=max(1, min(batch_size, 10000))),
+        fmt,
+        embeddings=store.get_embeddings_for_songs if embeddings and store is not None else None,
+    )
+    suffix = "arrows" if fmt == "arrow" else "ndjson"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="catalog.{suffix}"'},
+    )
+
+
+@app.post("/api/admin/trending/recompute")
+async def recompute_trending(request: Request):
+    """
+    Admin endpoint to rebuild every song's hot score from the listens table.
+    Needed only after changing TRENDING_HALF_LIFE_HOURS.
+    """
+    _require_admin(request)
+    try:
+        updated = await db_recompute_hot_scores()
+        return {"status": "ok", "updated": updated, "half_life_hours": TRENDING_HALF_LIFE_HOURS}
+    except Exception as e:
+        log.exception("recompute_trending failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/admin/profile/start")
+async def start_profile(
+    request: Request,
+    sample_rate: float | None = None,
+    route: str | None = None,
+    interval_ms: float | None = None,
+    duration: float | None = None,
+    reset: bool = True,
+):
+    """
+    Start the sampling profiler for a fraction of requests (sample_rate) and/or requests whose path starts
+    with route, for at most duration seconds (PROFILER_MAX_SECONDS). Takes effect immediately, no restart.
+    """
+    _require_admin(request)
+    return PROFILER.start(sample_rate=sample_rate, route=route, interval_ms=interval_ms, duration_seconds=duration, reset=reset)
+
+
+@app.post("/api/admin/profile/stop")
+async def stop_profile(request: Request):
+    _require_admin(request)
+    return PROFILER.stop()
+
+
+@app.get("/api/admin/profile")
+async def download_profile(request: Request):
+    """
+    Collected samples as collapsed stacks (flamegraph.pl / speedscope input); profiler state is in the
+    X-Profile-* headers. Collection keeps running until stopped.
+    """
+    _require_admin(request)
+    status = PROFILER.status()
+    return Response(
+        content=PROFILER.collapsed(),
+        media_type="text/plain; charset=utf-8",
+        headers={
+            "Content-Disposition": 'attachment; filename="profile.collapsed"',
+            "X-Profile-Enabled": "true" if status["enabled"] else "false",
+            "X-Profile-Samples": str(status["samples"]),
+            "X-Profile-Requests": str(status["profiled_requests"]),
+        },
+    )
+
+
+SEARCH_MAX_LIMIT = 100
+
+
+@app.get("/api/search")
+async def search(q: str = "", genre: str | None = None, limit: int = 20, compact: bool = False):
+    """
+    Search songs by title, artist, album or genre. Words match as prefixes (type-ahead) and close
+    misspellings of titles/artists still match; results are ordered by relevance blended with play count.
+    compact=true drops the duplicate name/image/primary_genre fields.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="q is required")
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    normalized_genre = None
+    if genre and str(genre).strip().lower() != "all":
+        normalized_genre = str(genre).strip().lower()
+    try:
+        with stage("db_fetch"):
+            songs = await db_search_songs(q.strip(), genre=normalized_genre, limit=limit)
+        with stage("serialization"):
+            body = encode_songs_payload(songs, compact=compact)
+        return Response(content=body, media_type="application/json")
+    except Exception as e:
+        log.exception("/search failed: %s", e)
+        return {"songs": []}
+
+
 @app.get("/api/discover")
-async def discover(request: Request, genre: str | None = None, limit: int = 20):
+async def discover(
+    request: Request, genre: str | None = None, limit: int = 20, compact: bool = False, session: str | None = None
+):
     """
-    Discover more songs: returns random songs or less frequently played songs.
+    Discover more songs: a random sample of the least played songs.
+    session: any client-chosen id; calls with the same session never repeat a song until the whole
+    discover pool has been served (those responses are per session and bypass the response cache).
+    compact=true drops the duplicate name/image/primary_genre fields.
     """
     if SAFE_MODE:
         print("SAFE MODE ACTIVE:", request.url.path, flush=True)
@@ -748,11 +1303,21 @@ async def discover(request: Request, genre: str | None = None, limit: int = 20):
         if genre and str(genre).strip().lower() != "all":
             normalized_genre = str(genre).strip().lower()
         
-        # Get discover songs (random/least played)
-        songs = await db_get_discover_songs(genre=normalized_genre, limit=limit)
+        if session:
+            with stage("db_fetch"):
+                songs = await DISCOVER.sample(normalized_genre, limit, session=session)
+            with stage("serialization"):
+                body = encode_songs_payload(songs, compact=compact)
+            return Response(content=body, media_type="application/json", headers={"Cache-Control": "no-store"})
         
-        result = [_to_recommendation_item(song) for song in songs]
-        return {"songs": result}
+        async def build() -> list[Any]:
+            # Random sample of the least-played pool
+            return await DISCOVER.sample(normalized_genre, limit)
+        
+        return await _cached_songs_response(
+            request, "/api/discover", {"genre": normalized_genre, "limit": limit}, build,
+            compact=compact, listen_sensitive=True,
+        )
     except Exception as e:
         log.exception("/discover failed: %s", e)
         return {"songs": []}
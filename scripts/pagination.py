@@ -0,0 +1,58 @@
+"""
+Opaque keyset cursors for /api/songs.
+A cursor names the ordering it belongs to and the (sort value, id) of the last row of the previous page;
+the next page is everything strictly after that pair in the ordering, served from a (sort key, id) index.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import math
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+# Orderings that support cursors; "discover" is random and keeps plain LIMIT
+CURSOR_ORDERINGS = ("latest", "trending")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def ordering_for(type: str | None) -> str | None:
+    """Cursor ordering for a /api/songs type, or None if the type has no stable order."""
+    if type == "trending":
+        return "trending"
+    if type == "discover":
+        return None
+    return "latest"
+
+
+def encode_cursor(ordering: str, value: Any, song_id: Any) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps({"o": ordering, "v": value, "id": str(song_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, ordering: str) -> tuple[Any, str]:
+    """(sort value, id) from a cursor token; raises InvalidCursor if malformed or from another ordering."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+        if data["o"] != ordering:
+            raise InvalidCursor(f"cursor belongs to ordering {data['o']!r}, not {ordering!r}")
+        value = data["v"]
+        if ordering == "latest":
+            value = datetime.fromisoformat(value)
+        else:
+            value = float(value)
+            if not math.isfinite(value):
+                raise InvalidCursor("malformed cursor")
+        return value, str(UUID(data["id"]))
+    except InvalidCursor:
+        raise
+    except Exception as e:
+        raise InvalidCursor("malformed cursor") from e
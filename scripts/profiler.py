@@ -0,0 +1,222 @@
+"""
+On-demand sampling profiler for live requests (POST /api/admin/profile/start, GET /api/admin/profile).
+While enabled, the HTTP middleware marks a fraction of requests (optionally only paths under a route
+prefix) as profiled, and a background thread samples the Python stacks of the threads working for them
+every PROFILER_INTERVAL_MS. Samples are aggregated as collapsed stacks ("frame;frame;frame count"),
+the input format of flamegraph.pl, speedscope and similar tools.
+
+Event-loop samples are attributed through the running task's context on Python 3.12+; on older
+interpreters the loop is sampled whenever any profiled request is in flight. Vector-ops threads are
+sampled only while they run a call made by a profiled request (VectorOpsExecutor wraps its calls in
+thread_span()).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "1.0"))
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+# Safety net: a started profile stops by itself after this long
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "300"))
+PROFILER_MAX_STACKS = int(os.getenv("PROFILER_MAX_STACKS", "20000"))
+PROFILER_MAX_DEPTH = 128
+
+_profiled: ContextVar[bool] = ContextVar("profiled", default=False)
+
+TRUNCATED_STACK = "[other stacks]"
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+def _collapse(frame: Any, root: str) -> str:
+    labels: list[str] = []
+    while frame is not None and len(labels) < PROFILER_MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(root)
+    labels.reverse()
+    return ";".join(labels)
+
+
+class SamplingProfiler:
+    """
+    start() turns profiling on (resetting the collected stacks unless reset=False) and stop() turns it off;
+    both can be called at any time without a restart. begin()/end() bracket a request in the middleware.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.sample_rate = PROFILER_SAMPLE_RATE
+        self.route: str | None = None
+        self.interval = PROFILER_INTERVAL_MS / 1000.0
+        self.deadline = 0.0
+        self.started_at: float | None = None
+        self.samples = 0
+        self.requests = 0
+        self._stacks: Counter[str] = Counter()
+        self._active = 0
+        self._threads: dict[int, int] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(
+        self,
+        sample_rate: float | None = None,
+        route: str | None = None,
+        interval_ms: float | None = None,
+        duration_seconds: float | None = None,
+        reset: bool = True,
+    ) -> dict[str, Any]:
+        self.stop()
+        with self._lock:
+            if reset:
+                self._stacks.clear()
+                self.samples = 0
+                self.requests = 0
+            self.sample_rate = PROFILER_SAMPLE_RATE if sample_rate is None else max(0.0, min(1.0, sample_rate))
+            self.route = route or None
+            self.interval = max(0.001, (PROFILER_INTERVAL_MS if interval_ms is None else interval_ms) / 1000.0)
+            duration = PROFILER_MAX_SECONDS if not duration_seconds or duration_seconds <= 0 else min(duration_seconds, PROFILER_MAX_SECONDS)
+            self.deadline = time.monotonic() + duration
+            self.started_at = time.time()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), name="profiler", daemon=True)
+        self.enabled = True
+        self._thread.start()
+        return self.status()
+
+    def stop(self) -> dict[str, Any]:
+        self.enabled = False
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+        return self.status()
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            distinct = len(self._stacks)
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "route": self.route,
+            "interval_ms": round(self.interval * 1000, 3),
+            "seconds_left": max(0.0, round(self.deadline - time.monotonic(), 1)) if self.enabled else 0.0,
+            "started_at": self.started_at,
+            "profiled_requests": self.requests,
+            "samples": self.samples,
+            "distinct_stacks": distinct,
+        }
+
+    def begin(self, path: str) -> object | None:
+        """Called for every request; returns a token for end() if this request is profiled, else None."""
+        if not self.enabled:
+            return None
+        if self.route and not path.startswith(self.route):
+            return None
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._loop_thread = threading.get_ident()
+        self._active += 1
+        self.requests += 1
+        return _profiled.set(True)
+
+    def end(self, token: object | None) -> None:
+        if token is not None:
+            _profiled.reset(token)  # type: ignore[arg-type]
+            self._active = max(0, self._active - 1)
+
+    @contextmanager
+    def thread_span(self) -> Iterator[None]:
+        """Mark the calling worker thread as working for a profiled request while the block runs."""
+        if not _profiled.get():
+            yield
+            return
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                left = self._threads.get(ident, 1) - 1
+                if left > 0:
+                    self._threads[ident] = left
+                else:
+                    self._threads.pop(ident, None)
+
+    def collapsed(self) -> str:
+        """Collected samples as collapsed stacks, heaviest first."""
+        with self._lock:
+            items = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def _loop_profiled(self) -> bool:
+        loop = self._loop
+        if loop is None:
+            return False
+        task = asyncio.current_task(loop)
+        if task is None:
+            return False  # idle in the selector
+        get_context = getattr(task, "get_context", None)
+        if get_context is None:
+            return True
+        return bool(get_context().get(_profiled, False))
+
+    def _sample(self, own: int) -> None:
+        with self._lock:
+            workers = set(self._threads)
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks: list[str] = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            if ident == self._loop_thread:
+                if not self._loop_profiled():
+                    continue
+            elif ident not in workers:
+                continue
+            stacks.append(_collapse(frame, names.get(ident, f"thread-{ident}")))
+        if not stacks:
+            return
+        with self._lock:
+            for stack in stacks:
+                if stack not in self._stacks and len(self._stacks) >= PROFILER_MAX_STACKS:
+                    stack = TRUNCATED_STACK
+                self._stacks[stack] += 1
+            self.samples += len(stacks)
+
+    def _run(self, stop: threading.Event) -> None:
+        own = threading.get_ident()
+        while not stop.wait(self.interval):
+            if time.monotonic() >= self.deadline:
+                self.enabled = False
+                break
+            if self._active or self._threads:
+                try:
+                    self._sample(own)
+                except Exception:
+                    pass
+
+
+PROFILER = SamplingProfiler()
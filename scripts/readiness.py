@@ -0,0 +1,56 @@
+"""
+Per-component readiness for /api/ready.
+Startup no longer blocks on warm-up: each component (database, vector store, recommender, co-listen model)
+reports its own state while the background warm-up task brings it up.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Any
+
+STARTING = "starting"
+READY = "ready"
+DEGRADED = "degraded"  # up, but running without something optional (e.g. no embeddings)
+FAILED = "failed"
+
+# Components that must be READY (or DEGRADED) before /api/ready returns 200
+READINESS_REQUIRED = tuple(
+    name.strip() for name in os.getenv("READINESS_REQUIRED", "database").split(",") if name.strip()
+)
+
+
+class Readiness:
+    """Component name -> (state, detail, time of last change). Unknown components count as STARTING."""
+
+    def __init__(self, components: list[str], required: tuple[str, ...] = READINESS_REQUIRED) -> None:
+        self.required = required
+        self._states: dict[str, dict[str, Any]] = {}
+        self._started_at = time.time()
+        for name in list(components) + [r for r in required if r not in components]:
+            self.set(name, STARTING)
+
+    def set(self, name: str, state: str, detail: str | None = None) -> None:
+        self._states[name] = {"state": state, "detail": detail, "since": time.time()}
+
+    def state(self, name: str) -> str:
+        entry = self._states.get(name)
+        return entry["state"] if entry else STARTING
+
+    @property
+    def settled(self) -> bool:
+        """True once no component is still starting."""
+        return all(entry["state"] != STARTING for entry in self._states.values())
+
+    @property
+    def ready(self) -> bool:
+        return all(self.state(name) in (READY, DEGRADED) for name in self.required)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "warming_up": not self.settled,
+            "uptime_seconds": round(time.time() - self._started_at, 3),
+            "components": {name: dict(entry) for name, entry in self._states.items()},
+        }
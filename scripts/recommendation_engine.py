@@ -3,6 +3,7 @@ Genre vectors and recommender: user history (song_id, embedding, played_at), rec
 """
 from __future__ import annotations
 
+import json
 import logging
 import os
 from datetime import datetime, timezone
@@ -23,6 +24,12 @@ GENRE_PROTOTYPES = [
 HISTORY_SIZE = 10
 TRENDING_SIZE = 20
 RECOMMEND_K = 20
+# Share of the final ranking score that comes from co-listen counts (0 = vector similarity only).
+COLISTEN_WEIGHT = float(os.getenv("COLISTEN_WEIGHT", "0.3"))
+# Genre prototype embeddings are cached here (scripts/music_db, whatever the working directory) so restarts skip the embedding call
+GENRE_VECTORS_PATH = os.getenv(
+    "GENRE_VECTORS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "music_db", "genre_vectors.json")
+)
 
 
 def _cosine_similarity(a: Any, b: Any) -> float:
@@ -59,6 +66,30 @@ def compute_genre_vectors(api_key: str | None = None) -> dict[str, list[float]]:
         return {}
 
 
+def load_or_compute_genre_vectors(api_key: str | None = None, path: str = GENRE_VECTORS_PATH) -> dict[str, list[float]]:
+    """Genre vectors from the on-disk cache if it matches EMBEDDING_MODEL, else compute_genre_vectors() and cache them."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("model") == EMBEDDING_MODEL and cached.get("vectors"):
+            return cached["vectors"]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        log.warning("Ignoring unreadable genre vector cache %s: %s", path, e)
+    vectors = compute_genre_vectors(api_key)
+    if vectors:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"model": EMBEDDING_MODEL, "vectors": vectors}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            log.warning("Could not cache genre vectors to %s: %s", path, e)
+    return vectors
+
+
 def assign_primary_genre(song_embedding: list[float], genre_vectors: dict[str, list[float]]) -> str:
     if not genre_vectors or not song_embedding:
         return "Unknown"
@@ -73,17 +104,54 @@ def assign_primary_genre(song_embedding: list[float], genre_vectors: dict[str, l
     return best_genre
 
 
+def blend_scores(
+    vector_hits: list[tuple[Any, float]],
+    colisten_scores: dict[str, float] | None = None,
+    weight: float = COLISTEN_WEIGHT,
+) -> list[tuple[str, float]]:
+    """
+    Blend vector search hits (song_id, distance; lower is closer) with co-listen scores (higher is better).
+    Both signals are min-max normalised to [0, 1] over the candidates; songs only one signal knows about
+    score 0 on the other. Returns (song_id, score) pairs, best first.
+    """
+    vector_sim: dict[str, float] = {}
+    if vector_hits:
+        distances = [float(d) for _, d in vector_hits]
+        lo, hi = min(distances), max(distances)
+        span = hi - lo
+        for (sid, _), d in zip(vector_hits, distances):
+            key = str(sid)
+            if key not in vector_sim:
+                vector_sim[key] = 1.0 - (d - lo) / span if span > 0 else 1.0
+    colisten_sim: dict[str, float] = {}
+    if colisten_scores and weight > 0:
+        top = max(colisten_scores.values())
+        if top > 0:
+            colisten_sim = {str(sid): s / top for sid, s in colisten_scores.items()}
+    blended = {
+        sid: (1.0 - weight) * vector_sim.get(sid, 0.0) + weight * colisten_sim.get(sid, 0.0)
+        for sid in vector_sim.keys() | colisten_sim.keys()
+    }
+    # Stable on ties: vector order first, then co-listen order
+    order = {sid: i for i, sid in enumerate(list(vector_sim) + [s for s in colisten_sim if s not in vector_sim])}
+    return sorted(blended.items(), key=lambda kv: (-kv[1], order[kv[0]]))
+
+
 class Recommender:
     def __init__(
         self,
         db: Any,
         genre_vectors: dict[str, list[float]] | None = None,
         history_size: int = HISTORY_SIZE,
+        colisten: Any = None,
+        colisten_weight: float = COLISTEN_WEIGHT,
     ) -> None:
         self._db = db
         self._history_size = history_size
         self._history: list[tuple[Any, list[float], datetime]] = []
         self._genre_vectors = genre_vectors or {}
+        self._colisten = colisten
+        self._colisten_weight = colisten_weight
 
     def set_genre_vectors(self, genre_vectors: dict[str, list[float]]) -> None:
         self._genre_vectors = genre_vectors
@@ -140,20 +208,36 @@ class Recommender:
             centroid = np.mean(vectors, axis=0).tolist()
             history_ids = self.get_history_ids()
             fetch_k = k + len(history_ids)
-            docs = self._db.similarity_search_by_vector(centroid, k=fetch_k)
+            scored = self._db.similarity_search_by_vector_with_score(centroid, k=fetch_k)
         except Exception as e:
             log.warning("recommend_next similarity_search_by_vector failed: %s", e)
             return (trending_fallback[:k] if trending_fallback else [])
-        seen: set[Any] = set()
-        out: list[dict[str, Any]] = []
-        for doc in docs or []:
+        meta_by_id: dict[str, dict[str, Any]] = {}
+        vector_hits: list[tuple[Any, float]] = []
+        for doc, distance in scored or []:
             meta = getattr(doc, "metadata", None) or {}
             sid = meta.get("id")
-            if sid is None or sid in history_ids or sid in seen:
+            if sid is None:
+                continue
+            meta_by_id.setdefault(str(sid), meta)
+            vector_hits.append((sid, distance))
+        colisten_scores: dict[str, float] = {}
+        if self._colisten is not None and self._colisten_weight > 0:
+            try:
+                colisten_scores = self._colisten.score_candidates(self.get_history_song_ids_ordered(self._history_size), k=fetch_k)
+            except Exception as e:
+                log.warning("recommend_next co-listen scoring failed: %s", e)
+        history_keys = {str(h) for h in history_ids}
+        out: list[dict[str, Any]] = []
+        for sid, _score in blend_scores(vector_hits, colisten_scores, weight=self._colisten_weight):
+            if sid in history_keys:
+                continue
+            meta = meta_by_id.get(sid)
+            if meta is None:
+                # Co-listen-only candidates carry no store metadata here; /api/recommend hydrates them from Postgres.
                 continue
-            seen.add(sid)
             out.append({
-                "id": sid,
+                "id": meta.get("id"),
                 "title": meta.get("name") or "",
                 "artist": meta.get("artist") or "",
                 "image": meta.get("image") or "",
@@ -0,0 +1,95 @@
+"""
+Per-request timing breakdown, emitted as a Server-Timing header (and optionally one JSON log line).
+The HTTP middleware starts a RequestTiming in a context variable; handlers, db.py and vector_store.py
+record named spans into whichever request is current, including from vector-ops threads
+(VectorOpsExecutor copies the context). Outside a sampled request, record() is a no-op.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+log = logging.getLogger("request_timing")
+
+# Fraction of requests that get a timing context / Server-Timing header, and that also log a JSON line
+REQUEST_TIMING_SAMPLE_RATE = float(os.getenv("REQUEST_TIMING_SAMPLE_RATE", "1.0"))
+REQUEST_TIMING_LOG_SAMPLE_RATE = float(os.getenv("REQUEST_TIMING_LOG_SAMPLE_RATE", "0"))
+
+_current: ContextVar["RequestTiming | None"] = ContextVar("request_timing", default=None)
+
+
+class RequestTiming:
+    """Span name -> (total seconds, count) for one request."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.spans: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            span = self.spans.get(name)
+            if span is None:
+                self.spans[name] = [seconds, 1]
+            else:
+                span[0] += seconds
+                span[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: one metric per span plus total, durations in ms."""
+        with self._lock:
+            spans = sorted(self.spans.items())
+        parts = [f"{name};dur={total * 1000:.2f}" for name, (total, _count) in spans]
+        parts.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(parts)
+
+    def as_dict(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {name: {"ms": round(total * 1000, 3), "count": int(count)} for name, (total, count) in self.spans.items()}
+
+
+def sampled(rate: float) -> bool:
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+def start() -> tuple[RequestTiming, object]:
+    """Begin timing the current request; pass the token to finish()."""
+    timing = RequestTiming()
+    return timing, _current.set(timing)
+
+
+def finish(token: object) -> None:
+    _current.reset(token)  # type: ignore[arg-type]
+
+
+def current() -> RequestTiming | None:
+    return _current.get()
+
+
+def record(name: str, seconds: float) -> None:
+    timing = _current.get()
+    if timing is not None:
+        timing.add(name, seconds)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Record the wall time of the block as span `name` of the current request (works around awaits)."""
+    if _current.get() is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - t0)
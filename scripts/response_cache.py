@@ -0,0 +1,139 @@
+"""
+TTL cache of pre-serialized JSON responses for the read endpoints (/api/trending, /api/songs, /api/discover).
+Entries are keyed on path plus normalized query parameters and carry a content ETag for 304 revalidation.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any
+
+# Seconds a cached response stays fresh, per endpoint
+RESPONSE_CACHE_TTLS: dict[str, float] = {
+    "/api/trending": float(os.getenv("CACHE_TTL_TRENDING", "30")),
+    "/api/songs": float(os.getenv("CACHE_TTL_SONGS", "60")),
+    "/api/discover": float(os.getenv("CACHE_TTL_DISCOVER", "15")),
+}
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+# Listen-dependent entries may lag new listens by at most this many seconds (avoids a miss per listen)
+LISTEN_STALENESS_SECONDS = float(os.getenv("CACHE_LISTEN_STALENESS_SECONDS", "5"))
+
+
+def normalize_params(params: dict[str, Any]) -> dict[str, str]:
+    """Canonical string form of query params: genre/type lowercased, 'all' genre dropped, None dropped."""
+    out: dict[str, str] = {}
+    for name, value in params.items():
+        if value is None:
+            continue
+        text = str(value).strip()
+        if name in ("genre", "type"):
+            text = text.lower()
+            if name == "genre" and text == "all":
+                continue
+        if text:
+            out[name] = text
+    return out
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """True if an If-None-Match header value matches etag (weak comparison, '*' matches anything)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "path", "params", "created_at", "expires_at", "listen_sensitive")
+
+    def __init__(self, body: bytes, path: str, params: dict[str, str], ttl: float, listen_sensitive: bool) -> None:
+        now = time.monotonic()
+        self.body = body
+        self.etag = make_etag(body)
+        self.path = path
+        self.params = params
+        self.created_at = now
+        self.expires_at = now + ttl
+        self.listen_sensitive = listen_sensitive
+
+
+class ResponseCache:
+    """
+    LRU of CachedResponse by key. Listens do not evict entries one by one: mark_listen() records the time,
+    and listen-sensitive entries older than that (and than LISTEN_STALENESS_SECONDS) count as misses.
+    """
+
+    def __init__(
+        self,
+        ttls: dict[str, float] | None = None,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        listen_staleness: float = LISTEN_STALENESS_SECONDS,
+    ) -> None:
+        self._ttls = dict(ttls or RESPONSE_CACHE_TTLS)
+        self._max_entries = max_entries
+        self._listen_staleness = listen_staleness
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._last_listen = float("-inf")
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(path: str, params: dict[str, str]) -> str:
+        return path + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = time.monotonic()
+            stale = now >= entry.expires_at or (
+                entry.listen_sensitive
+                and entry.created_at < self._last_listen
+                and now - entry.created_at >= self._listen_staleness
+            )
+            if not stale:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, path: str, params: dict[str, str], body: bytes, listen_sensitive: bool = False) -> CachedResponse:
+        entry = CachedResponse(body, path, params, self._ttls.get(path, 0.0), listen_sensitive)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def mark_listen(self) -> None:
+        """Record that play counts changed; listen-sensitive entries refresh once past the staleness window."""
+        self._last_listen = time.monotonic()
+
+    def invalidate(self, path: str | None = None) -> int:
+        """Drop every entry for path (or all entries). Returns how many were dropped."""
+        if path is None:
+            n = len(self._entries)
+            self._entries.clear()
+            return n
+        keys = [k for k, e in self._entries.items() if e.path == path]
+        for k in keys:
+            del self._entries[k]
+        return len(keys)
@@ -0,0 +1,120 @@
+"""
+Fast JSON encoding for song list responses.
+Songs (dicts or asyncpg Records) are encoded once per song id into byte fragments and spliced into
+the response body, bypassing FastAPI's generic jsonable_encoder. Uses orjson when installed.
+Fragments expire after FRAGMENT_CACHE_TTL seconds, so catalog edits made by another process are
+picked up without a restart.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import Any, Iterable, Mapping
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", "20000"))
+FRAGMENT_CACHE_TTL = float(os.getenv("FRAGMENT_CACHE_TTL", "300"))
+
+# (song id, compact) -> (encoded song object, monotonic expiry). FIFO-evicted; invalidate_song() on upsert.
+_fragments: dict[tuple[str, bool], tuple[bytes, float]] = {}
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def song_item(song: Mapping[str, Any], compact: bool = False) -> dict[str, Any]:
+    """
+    Build the API dict for a song (ids and values as str/int only).
+    Works with old ChromaDB metadata, Postgres rows and asyncpg Records. compact=True drops the
+    duplicate aliases (name, image, primary_genre) and keeps title, coverUrl and genre.
+    """
+    raw_id = song.get("id")
+    id_val = str(raw_id) if raw_id is not None else ""
+    title = str(song.get("title") or song.get("name") or "")
+    artist = str(song.get("artist") or "")
+    album = str(song.get("album") or "")
+    genre = str(song.get("genre") or song.get("primary_genre") or "")
+    cover_url = str(song.get("cover_url") or song.get("image") or "")
+    preview_url = str(song.get("preview_url") or "")
+    duration = song.get("duration", 0)
+    tags = str(song.get("tags") or "")
+    duration_val = int(duration) if duration else 0
+    if compact:
+        return {
+            "id": id_val,
+            "title": title,
+            "artist": artist,
+            "album": album,
+            "genre": genre,
+            "preview_url": preview_url,
+            "coverUrl": cover_url,
+            "tags": tags,
+            "duration": duration_val,
+        }
+    return {
+        "id": id_val,
+        "name": title,
+        "artist": artist,
+        "album": album,
+        "genre": genre,
+        "preview_url": preview_url,
+        "image": cover_url,
+        "coverUrl": cover_url,  # Frontend expects coverUrl
+        "primary_genre": genre,
+        "title": title,
+        "tags": tags,
+        "duration": duration_val,
+    }
+
+
+def encode_song(song: Mapping[str, Any], compact: bool = False, now: float | None = None) -> bytes:
+    """Encoded JSON object for one song, from the fragment cache when possible."""
+    raw_id = song.get("id")
+    if raw_id is None:
+        return dumps(song_item(song, compact))
+    if now is None:
+        now = time.monotonic()
+    key = (str(raw_id), compact)
+    entry = _fragments.get(key)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+    fragment = dumps(song_item(song, compact))
+    if entry is not None:
+        del _fragments[key]  # re-inserted at the end, so FIFO eviction goes by load time
+    elif len(_fragments) >= FRAGMENT_CACHE_SIZE:
+        del _fragments[next(iter(_fragments))]
+    _fragments[key] = (fragment, now + FRAGMENT_CACHE_TTL)
+    return fragment
+
+
+def encode_songs_payload(songs: Iterable[Mapping[str, Any]], compact: bool = False, **extra: Any) -> bytes:
+    """Encode {"songs": [...], **extra} by splicing cached per-song fragments."""
+    now = time.monotonic()
+    body = b'{"songs":[' + b",".join([encode_song(s, compact, now) for s in songs]) + b"]"
+    for name, value in extra.items():
+        body += b"," + dumps(name) + b":" + dumps(value)
+    return body + b"}"
+
+
+def invalidate_song(song_id: Any) -> None:
+    """Drop cached fragments for a song whose catalog row changed."""
+    sid = str(song_id)
+    _fragments.pop((sid, False), None)
+    _fragments.pop((sid, True), None)
+
+
+def fragment_count() -> int:
+    return len(_fragments)
+
+
+def clear_fragments() -> None:
+    _fragments.clear()
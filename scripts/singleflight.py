@@ -0,0 +1,92 @@
+"""
+Request coalescing ("single-flight") for async reads.
+Concurrent calls with the same key share one in-flight task instead of each hitting Postgres or Chroma,
+so a burst of identical requests on a cold or just-expired cache becomes one query.
+Results are shared between callers and must be treated as read-only.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import os
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+T = TypeVar("T")
+
+_groups: list["SingleFlight"] = []
+
+
+def groups() -> list["SingleFlight"]:
+    """Every SingleFlight created so far (for metrics)."""
+    return list(_groups)
+
+
+def freeze(value: Any) -> Hashable:
+    """Hashable form of call arguments: lists/tuples/sets/dicts become tuples, floats stay exact."""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((freeze(v) for v in value), key=repr))
+    if isinstance(value, dict):
+        return tuple(sorted(((str(k), freeze(v)) for k, v in value.items()), key=lambda kv: kv[0]))
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class SingleFlight:
+    """
+    do(key, fn, ...) runs fn once per key at a time; callers arriving while it runs await the same task.
+    The shared task is shielded, so one caller being cancelled (client disconnect) does not cancel it
+    for the others. calls counts every do(); coalesced counts calls that joined an in-flight task.
+    """
+
+    def __init__(self, name: str, enabled: bool = SINGLEFLIGHT_ENABLED) -> None:
+        self.name = name
+        self.enabled = enabled
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+        _groups.append(self)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        self.calls += 1
+        if not self.enabled:
+            return await fn(*args, **kwargs)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, key=key: self._forget(key, _t))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every caller went away
+
+    def wrap(self, fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        """Decorator: coalesce calls of fn whose (normalized) arguments are equal."""
+        signature = inspect.signature(fn)
+        name = fn.__qualname__
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (name, freeze(bound.arguments))
+            return await self.do(key, fn, *args, **kwargs)
+
+        return wrapper
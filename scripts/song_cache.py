@@ -0,0 +1,62 @@
+"""
+In-process read-through cache of song catalog rows, keyed by song UUID string.
+Holds only catalog columns (no play statistics), so it only has to be invalidated when a song is upserted.
+Entries also expire after SONG_CACHE_TTL seconds, so edits made outside this process (another worker, the
+ingestion script, a manual UPDATE) show up without a restart.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Iterable
+
+SONG_CACHE_SIZE = int(os.getenv("SONG_CACHE_SIZE", "20000"))
+SONG_CACHE_TTL = float(os.getenv("SONG_CACHE_TTL", "300"))
+
+
+class SongRowCache:
+    """LRU map of song id -> row dict. Callers get copies, so cached rows are never mutated."""
+
+    def __init__(self, max_size: int = SONG_CACHE_SIZE, ttl: float = SONG_CACHE_TTL) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        # song id -> (row, monotonic expiry)
+        self._rows: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get_many(self, song_ids: Iterable[str]) -> tuple[dict[str, dict[str, Any]], list[str]]:
+        """Split song_ids into cached rows (id -> row copy) and the ids that must be fetched."""
+        found: dict[str, dict[str, Any]] = {}
+        missing: list[str] = []
+        now = time.monotonic()
+        for sid in song_ids:
+            entry = self._rows.get(sid)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._rows[sid]
+                missing.append(sid)
+                continue
+            self._rows.move_to_end(sid)
+            found[sid] = dict(entry[0])
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def put(self, row: dict[str, Any]) -> None:
+        sid = str(row["id"])
+        self._rows[sid] = (dict(row), time.monotonic() + self._ttl)
+        self._rows.move_to_end(sid)
+        while len(self._rows) > self._max_size:
+            self._rows.popitem(last=False)
+
+    def invalidate(self, song_id: Any) -> None:
+        self._rows.pop(str(song_id), None)
+
+    def clear(self) -> None:
+        self._rows.clear()
@@ -0,0 +1,208 @@
+"""
+Synthetic catalog, listen sessions and an in-memory vector store for offline evaluation and benchmarks.
+No network, no Chroma, no Gemini: embeddings are random vectors clustered by genre.
+"""
+
+from __future__ import annotations
+
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+import numpy as np
+
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    class Document:  # type: ignore[no-redef]
+        """Minimal stand-in with the two attributes the recommender reads."""
+
+        def __init__(self, page_content: str = "", metadata: dict[str, Any] | None = None) -> None:
+            self.page_content = page_content
+            self.metadata = metadata or {}
+
+SYNTHETIC_GENRES = ["rock", "pop", "jazz", "hip hop", "electronic", "classical", "country", "metal"]
+EMBEDDING_DIM = 64
+SESSION_GAP = timedelta(hours=2)
+LISTEN_SPACING = timedelta(minutes=3)
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def generate_catalog(
+    n_songs: int = 1000,
+    genres: list[str] | None = None,
+    dim: int = EMBEDDING_DIM,
+    seed: int = 42,
+) -> list[dict[str, Any]]:
+    """
+    Build n_songs song dicts in the Postgres row shape plus an "embedding" key.
+    Embeddings are a per-genre centroid plus noise, so vector neighbours mostly share a genre.
+    """
+    genres = genres or SYNTHETIC_GENRES
+    rng = random.Random(seed)
+    nprng = np.random.default_rng(seed)
+    centroids = {g: nprng.normal(size=dim) for g in genres}
+    songs: list[dict[str, Any]] = []
+    for i in range(n_songs):
+        genre = genres[i % len(genres)]
+        emb = centroids[genre] + nprng.normal(scale=0.8, size=dim)
+        songs.append({
+            "id": _uuid(rng),
+            "deezer_id": str(100000 + i),
+            "title": f"Song {i}",
+            "artist": f"Artist {i % max(1, n_songs // 8)}",
+            "album": f"Album {i % max(1, n_songs // 4)}",
+            "genre": genre,
+            "cover_url": f"https://example.invalid/cover/{i}.jpg",
+            "preview_url": f"https://example.invalid/preview/{i}.mp3",
+            "duration": 120 + i % 180,
+            "play_count": 0,
+            "embedding": emb.astype(np.float32).tolist(),
+        })
+    return songs
+
+
+def generate_listens(
+    catalog: list[dict[str, Any]],
+    n_users: int = 200,
+    sessions_per_user: int = 5,
+    session_length: int = 8,
+    companion_prob: float = 0.4,
+    seed: int = 42,
+    start: datetime | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Generate listen rows (id, user_id, song_id, played_at) sorted by played_at.
+    Users stick to one or two favourite genres; within a session the next song is either one of the
+    previous song's fixed "companions" (co-listen structure embeddings can't see) or a popular song of
+    the same genre (structure embeddings can see). Popularity is Zipf-like within each genre.
+    """
+    rng = random.Random(seed)
+    start = start or datetime(2026, 1, 1)
+    by_genre: dict[str, list[dict[str, Any]]] = {}
+    for song in catalog:
+        by_genre.setdefault(song["genre"], []).append(song)
+    genre_weights = {g: [1.0 / (rank + 1) for rank in range(len(songs))] for g, songs in by_genre.items()}
+    companions = {
+        song["id"]: [rng.choice(catalog)["id"] for _ in range(5)]
+        for song in catalog
+    }
+    song_by_id = {song["id"]: song for song in catalog}
+    genres = list(by_genre)
+
+    listens: list[dict[str, Any]] = []
+    for _ in range(n_users):
+        user_id = _uuid(rng)
+        favourites = rng.sample(genres, k=min(len(genres), rng.choice([1, 2])))
+        t = start + timedelta(minutes=rng.randrange(0, 60 * 24))
+        for _ in range(sessions_per_user):
+            genre = rng.choice(favourites)
+            current = rng.choices(by_genre[genre], weights=genre_weights[genre])[0]
+            for _ in range(session_length):
+                listens.append({"id": _uuid(rng), "user_id": user_id, "song_id": current["id"], "played_at": t})
+                t += LISTEN_SPACING + timedelta(seconds=rng.randrange(0, 60))
+                if rng.random() < companion_prob:
+                    current = song_by_id[rng.choice(companions[current["id"]])]
+                else:
+                    genre = current["genre"] if current["genre"] in favourites else rng.choice(favourites)
+                    current = rng.choices(by_genre[genre], weights=genre_weights[genre])[0]
+            t += SESSION_GAP + timedelta(hours=rng.randrange(0, 48))
+    listens.sort(key=lambda row: (row["played_at"], row["id"]))
+    return listens
+
+
+class SyntheticVectorStore:
+    """
+    In-memory stand-in for MusicVectorStore: same read/write methods, brute-force squared-L2 search
+    (Chroma's default distance) over a numpy matrix. Songs must carry an "embedding" key.
+    """
+
+    def __init__(self, songs: list[dict[str, Any]] | None = None) -> None:
+        self.embeddings_enabled = True
+        self._ids: list[str] = []
+        self._meta: list[dict[str, Any]] = []
+        self._index: dict[str, int] = {}
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        if songs:
+            self.add_songs(songs)
+
+    def add_songs(self, songs_list: list[dict[str, Any]]) -> None:
+        rows = [s for s in songs_list if s.get("embedding")]
+        if not rows:
+            return
+        new_vectors = np.asarray([s["embedding"] for s in rows], dtype=np.float32)
+        for s in rows:
+            sid = str(s.get("id") or s.get("deezer_id") or "")
+            self._index[sid] = len(self._ids)
+            self._ids.append(sid)
+            self._meta.append({
+                "id": sid,
+                "deezer_id": str(s.get("deezer_id") or sid),
+                "preview_url": s.get("preview_url") or "",
+                "image": s.get("image") or s.get("cover_url") or "",
+                "name": s.get("title") or s.get("name") or "",
+                "artist": s.get("artist") or "",
+                "album": s.get("album") or "",
+                "genre": s.get("genre") or "",
+                "tags": s.get("tags") or "",
+            })
+        self._matrix = new_vectors if self._matrix.size == 0 else np.vstack([self._matrix, new_vectors])
+
+    def index_songs(self, songs: list[dict[str, Any]]) -> None:
+        self.add_songs(songs)
+
+    def index_song(self, song: dict[str, Any]) -> None:
+        self.add_songs([song])
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def get_embedding_for_song(self, song_id: Any) -> list[float] | None:
+        i = self._index.get(str(song_id))
+        return None if i is None else self._matrix[i].tolist()
+
+    def get_embeddings_for_songs(self, song_ids: list[Any]) -> dict[str, list[float]]:
+        out: dict[str, list[float]] = {}
+        for sid in song_ids:
+            emb = self.get_embedding_for_song(sid)
+            if emb is not None:
+                out[str(sid)] = emb
+        return out
+
+    def similarity_search_by_vector_with_score(self, embedding: list[float], k: int = 5) -> list[tuple[Any, float]]:
+        if not self._ids:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        distances = ((self._matrix - query) ** 2).sum(axis=1)
+        k = min(k, len(self._ids))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        return [(Document(page_content="", metadata=dict(self._meta[i])), float(distances[i])) for i in top]
+
+    def similarity_search_by_vector(self, embedding: list[float], k: int = 5):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k)]
+
+    def get_all_songs(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "id": m["id"],
+                "title": m["name"],
+                "artist": m["artist"],
+                "image": m["image"],
+                "preview_url": m["preview_url"],
+                "tags": m["tags"],
+            }
+            for m in self._meta
+        ]
+
+    def get_all_songs_with_primary_genre(self, genre_vectors: dict[str, list[float]], assign_genre_fn: Any) -> list[dict[str, Any]]:
+        out = self.get_all_songs()
+        if not genre_vectors or not assign_genre_fn:
+            return out
+        for i, song in enumerate(out):
+            song["primary_genre"] = assign_genre_fn(self._matrix[i].tolist(), genre_vectors)
+        return out
@@ -0,0 +1,112 @@
+"""
+Dedicated thread pool for blocking vector-store work (Chroma queries, embedding calls, NumPy).
+Async handlers await AsyncVectorStore methods instead of calling MusicVectorStore directly, so a slow
+vector query occupies a vector-ops thread rather than the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from profiler import PROFILER
+from singleflight import SingleFlight, freeze
+
+log = logging.getLogger("vector_executor")
+
+VECTOR_OPS_WORKERS = int(os.getenv("VECTOR_OPS_WORKERS", "4"))
+
+T = TypeVar("T")
+
+# Identical concurrent searches / embedding lookups share one executor call
+vector_flights = SingleFlight("vector")
+
+
+def _call(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    with PROFILER.thread_span():
+        return fn(*args, **kwargs)
+
+
+class VectorOpsExecutor:
+    """
+    Runs callables on a bounded thread pool. Callers beyond max_workers wait on a semaphore
+    (not in the pool's hidden queue), so queue_depth is exactly how many calls are waiting.
+    """
+
+    def __init__(self, max_workers: int = VECTOR_OPS_WORKERS) -> None:
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vector-ops")
+        self._slots = asyncio.Semaphore(max_workers)
+        self.queue_depth = 0
+        self.running = 0
+        self.completed = 0
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        self.queue_depth += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queue_depth -= 1
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            # Run in a copy of the caller's context so request_timing spans and profiler samples
+            # land on the calling request
+            ctx = contextvars.copy_context()
+            return await loop.run_in_executor(self._pool, functools.partial(ctx.run, _call, fn, *args, **kwargs))
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class AsyncVectorStore:
+    """Awaitable facade over a MusicVectorStore (or SyntheticVectorStore); every call runs on the executor."""
+
+    def __init__(self, store: Any, executor: VectorOpsExecutor) -> None:
+        self.store = store
+        self._executor = executor
+
+    @property
+    def embeddings_enabled(self) -> bool:
+        return bool(getattr(self.store, "embeddings_enabled", True))
+
+    async def count(self) -> int:
+        return await self._executor.run(self.store.count)
+
+    async def get_embedding_for_song(self, song_id: Any) -> list[float] | None:
+        return await self._executor.run(self.store.get_embedding_for_song, song_id)
+
+    async def get_embeddings_for_songs(self, song_ids: list[Any]) -> dict[str, list[float]]:
+        key = (id(self.store), "embeddings", freeze([str(s) for s in song_ids]))
+        return await vector_flights.do(key, self._executor.run, self.store.get_embeddings_for_songs, song_ids)
+
+    async def similarity_search_by_vector(self, embedding: list[float], k: int = 5) -> list[Any]:
+        key = (id(self.store), "search", k, freeze(embedding))
+        return await vector_flights.do(key, self._executor.run, self.store.similarity_search_by_vector, embedding, k=k)
+
+    async def similarity_search_by_vector_with_score(self, embedding: list[float], k: int = 5) -> list[tuple[Any, float]]:
+        key = (id(self.store), "search_scored", k, freeze(embedding))
+        return await vector_flights.do(
+            key, self._executor.run, self.store.similarity_search_by_vector_with_score, embedding, k=k
+        )
+
+    async def add_songs(self, songs_list: list[dict[str, Any]]) -> None:
+        await self._executor.run(self.store.add_songs, songs_list)
+
+    async def index_songs(self, songs: list[dict[str, Any]]) -> None:
+        await self._executor.run(self.store.index_songs, songs)
+
+    async def get_all_songs(self) -> list[dict[str, Any]]:
+        return await self._executor.run(self.store.get_all_songs)
+
+    async def get_all_songs_with_primary_genre(self, genre_vectors: dict[str, list[float]], assign_genre_fn: Any) -> list[dict[str, Any]]:
+        return await self._executor.run(self.store.get_all_songs_with_primary_genre, genre_vectors, assign_genre_fn)
@@ -19,6 +19,8 @@ from langchain_chroma import Chroma
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 
+from request_timing import timed
+
 PERSIST_DIR = "./music_db"
 COLLECTION_NAME = "music"
 # Chroma get() without limit returns only ~10 items; use explicit limit to get full catalog.
@@ -83,11 +85,12 @@ class GeminiEmbeddings(Embeddings):
         for i in range(0, len(texts), BATCH_SIZE):
             batch = texts[i:i + BATCH_SIZE]
             try:
-                result = self._client.models.embed_content(
-                    model=self._model,
-                    contents=batch,
-                    config=types.EmbedContentConfig(task_type="RETRIEVAL_DOCUMENT"),
-                )
+                with timed("embedding_api"):
+                    result = self._client.models.embed_content(
+                        model=self._model,
+                        contents=batch,
+                        config=types.EmbedContentConfig(task_type="RETRIEVAL_DOCUMENT"),
+                    )
                 for e in result.embeddings or []:
                     vals = e.values if e else None
                     out.append(list(vals) if vals else [])
@@ -100,11 +103,12 @@ class GeminiEmbeddings(Embeddings):
 
     def embed_query(self, text: str) -> list[float]:
         try:
-            result = self._client.models.embed_content(
-                model=self._model,
-                contents=text,
-                config=types.EmbedContentConfig(task_type="RETRIEVAL_QUERY"),
-            )
+            with timed("embedding_api"):
+                result = self._client.models.embed_content(
+                    model=self._model,
+                    contents=text,
+                    config=types.EmbedContentConfig(task_type="RETRIEVAL_QUERY"),
+                )
             if result.embeddings and len(result.embeddings) > 0 and result.embeddings[0].values:
                 return list(result.embeddings[0].values)
         except Exception as e:
@@ -170,6 +174,8 @@ class MusicVectorStore:
     """
     ChromaDB-backed vector store for songs with Google Gemini embeddings.
     Persists to ./music_db via PersistentClient (avoids nofile/Settings errors).
+    embeddings replaces the Gemini provider (e.g. a deterministic fake for benchmarks); no API key is
+    needed then.
     """
 
     def __init__(
@@ -177,6 +183,7 @@ class MusicVectorStore:
         persist_directory: str = PERSIST_DIR,
         collection_name: str = COLLECTION_NAME,
         api_key: str | None = None,
+        embeddings: Embeddings | None = None,
     ) -> None:
         self._vector_store = None
         self._embeddings = None
@@ -184,7 +191,7 @@ class MusicVectorStore:
         self._collection_name = collection_name
         self.embeddings_enabled = False
         api_key = api_key or os.getenv("GOOGLE_API_KEY")
-        if not api_key:
+        if embeddings is None and not api_key:
             log.warning("Embeddings disabled (no API key)")
             self.embeddings_enabled = False
             self._vector_store = None
@@ -193,7 +200,7 @@ class MusicVectorStore:
             os.getenv("ENV") == "development"
             or os.getenv("ENVIRONMENT") == "development"
         )
-        if is_dev:
+        if is_dev and embeddings is None:
             log.warning("Embeddings disabled (development environment)")
             self.embeddings_enabled = False
             self._vector_store = None
@@ -207,10 +214,12 @@ class MusicVectorStore:
             self._vector_store = None
             return
         try:
-            _log_available_embedding_models(api_key)
-            model = _normalize_embedding_model_from_env()
-            print(f"Using embedding model: {model}")
-            self._embeddings = GeminiEmbeddings(api_key=api_key, model=model)
+            if embeddings is None:
+                _log_available_embedding_models(api_key)
+                model = _normalize_embedding_model_from_env()
+                print(f"Using embedding model: {model}")
+                embeddings = GeminiEmbeddings(api_key=api_key, model=model)
+            self._embeddings = embeddings
             persistent_client = chromadb.PersistentClient(path=persist_path)
             
             # Check if collection exists and has wrong dimension
@@ -314,7 +323,8 @@ class MusicVectorStore:
             return None
         try:
             # Chroma where: simple equality where={"id": value} or explicit $eq
-            result = collection.get(where={"id": song_id}, include=["embeddings"])
+            with timed("chroma"):
+                result = collection.get(where={"id": song_id}, include=["embeddings"])
             if result and result.get("embeddings") and len(result["embeddings"]) > 0:
                 emb = result["embeddings"][0]
                 log.debug("get_embedding_for_song: found embedding for id=%s dim=%d", song_id, len(emb) if emb else 0)
@@ -324,6 +334,31 @@ class MusicVectorStore:
             log.warning("get_embedding_for_song failed for id=%s: %s", song_id, e)
         return None
 
+    def get_embeddings_for_songs(self, song_ids: list[Any]) -> dict[str, list[float]]:
+        """Return {song id: embedding} for the given ids in one Chroma query; ids without a document are omitted."""
+        if not getattr(self, "embeddings_enabled", True) or not song_ids:
+            return {}
+        if self._vector_store is None:
+            return {}
+        collection = getattr(self._vector_store, "_collection", None)
+        if collection is None:
+            return {}
+        try:
+            with timed("chroma"):
+                result = collection.get(where={"id": {"$in": [str(s) for s in song_ids]}}, include=["metadatas", "embeddings"])
+            metadatas = result.get("metadatas") or []
+            embeddings_list = result.get("embeddings")
+            if embeddings_list is None:
+                embeddings_list = []
+            out: dict[str, list[float]] = {}
+            for meta, emb in zip(metadatas, embeddings_list):
+                if isinstance(meta, dict) and meta.get("id") is not None and emb is not None and len(emb) > 0:
+                    out.setdefault(str(meta["id"]), list(emb))
+            return out
+        except Exception as e:
+            log.warning("get_embeddings_for_songs failed: %s", e)
+            return {}
+
     def count(self) -> int:
         """Return the number of documents in the store. Safe when collection is empty or missing."""
         if self._vector_store is None:
@@ -332,7 +367,8 @@ class MusicVectorStore:
         if collection is None:
             return 0
         try:
-            result = collection.get(include=[], limit=GET_ALL_LIMIT)
+            with timed("chroma"):
+                result = collection.get(include=[], limit=GET_ALL_LIMIT)
             ids = result.get("ids") or []
             return len(ids)
         except Exception:
@@ -350,11 +386,34 @@ class MusicVectorStore:
         if self.count() == 0:
             return []
         try:
-            return self._vector_store.similarity_search_by_vector(embedding, k=k)
+            with timed("chroma"):
+                return self._vector_store.similarity_search_by_vector(embedding, k=k)
         except Exception as e:
             log.warning("similarity_search_by_vector failed: %s", e)
             return []
 
+    def similarity_search_by_vector_with_score(self, embedding: list[float], k: int = 5) -> list[tuple[Any, float]]:
+        """
+        Return the k nearest (document, distance) pairs to the given embedding vector; lower distance is closer.
+        Returns [] if DB is empty.
+        """
+        if not getattr(self, "embeddings_enabled", True):
+            return []
+        if self._vector_store is None:
+            return []
+        collection = getattr(self._vector_store, "_collection", None)
+        if collection is None:
+            return []
+        if self.count() == 0:
+            return []
+        try:
+            # langchain_chroma returns raw Chroma distances here despite the method name
+            with timed("chroma"):
+                return self._vector_store.similarity_search_by_vector_with_relevance_scores(embedding, k=k)
+        except Exception as e:
+            log.warning("similarity_search_by_vector_with_score failed: %s", e)
+            return []
+
     def get_songs_by_vector(
         self,
         embedding: list[float],